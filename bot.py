@@ -1,26 +1,41 @@
 
 import asyncio
-import json
 import os
 import shutil
 import sys
+import time
 from datetime import datetime
-import threading
-import importlib.util
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from multiprocessing import Process
 import multiprocessing
 
+try:
+    import uvloop  # Not available on Windows
+except ImportError:
+    uvloop = None
 from loguru import logger
 from aiogram import Bot, Dispatcher, types
-from aiogram.filters import Command
+from aiogram.enums import ChatMemberStatus
+from aiogram.exceptions import TelegramAPIError
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from utils.config import Config
-from utils.bot_state import BotContext, IdleState, RunningState
+from utils.bot_state import BotContext
 from utils.keyboard_factory import KeyboardFactory
+from utils.rate_limited_bot import create_rate_limited_bot
+from utils.callback_data import (
+    IntervalCallback,
+    MoveChannelCallback,
+    RemoveChannelCallback,
+    RemoveChatCallback,
+    parse_interval_callback
+)
+from utils.states import AddChannelStates, CloneBotStates
+from utils.filters import AdminFilter
 from database.repository import Repository
-from services.chat_cache import ChatCacheService, CacheObserver, ChatInfo
+from services.chat_cache import ChatCacheService, CacheObserver
 from commands.commands import (
     StartCommand,
     HelpCommand,
@@ -30,6 +45,21 @@ from commands.commands import (
     TestMessageCommand,
     FindLastMessageCommand
 )
+
+# Member statuses that allow the bot to read and forward channel posts
+ADMIN_STATUSES = frozenset({ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR})
+
+# Bot commands: (name, Command class, ForwarderBot attributes passed to the constructor)
+_COMMAND_SPECS = (
+    ("start", StartCommand, ()),
+    ("help", HelpCommand, ()),
+    ("setlast", SetLastMessageCommand, ("bot",)),
+    ("getlast", GetLastMessageCommand, ()),
+    ("forwardnow", ForwardNowCommand, ("context",)),
+    ("test", TestMessageCommand, ("bot",)),
+    ("findlast", FindLastMessageCommand, ("bot",)),
+)
+
 class BotManager:
     """Manages multiple bot instances"""
     _instance = None
@@ -90,7 +120,7 @@ def run_bot_process(bot_token: str, owner_id: int, source_channels: list, bot_id
     logger.add(f"bot_{bot_id}.log", rotation="10 MB")
     
     # Create new event loop for this process
-    loop = asyncio.new_event_loop()
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     
     try:
@@ -130,18 +160,44 @@ async def run_bot_instance(bot_token: str, owner_id: int, source_channels: list,
     except Exception as e:
         logger.error(f"Bot {bot_id} crashed: {e}")
         raise
+    finally:
+        try:
+            await _shutdown_storage(bot_instance)
+        except Exception as e:
+            logger.error(f"Error during cleanup of bot {bot_id}: {e}")
+
+async def _shutdown_storage(bot: "ForwarderBot") -> None:
+    """Finish background handler writes, flush batched rows and close the database"""
+    await bot.context.wait_background_tasks()
+    try:
+        await Repository.flush_pending_writes()
+    finally:
+        await Repository.close_db()
 
 
 class ForwarderBot(CacheObserver):
     """Main bot class with Observer pattern implementation"""
     
+    # Static markups shared by all handlers
+    _BACK_TO_CHANNELS_MARKUP = InlineKeyboardBuilder().button(
+        text="Назад к каналам", callback_data="channels"
+    ).as_markup()
+    _TO_CHANNELS_MARKUP = InlineKeyboardBuilder().button(
+        text="🔙 К каналам", callback_data="channels"
+    ).as_markup()
+    _BACK_TO_INTERVALS_MARKUP = InlineKeyboardBuilder().button(
+        text="Назад к интервалам", callback_data="channel_intervals"
+    ).as_markup()
+    _CANCEL_TO_CHANNELS_MARKUP = InlineKeyboardBuilder().button(
+        text="Отмена", callback_data="channels"
+    ).as_markup()
+    
     def __init__(self):
         self.config = Config()
-        self.bot = Bot(token=self.config.bot_token)
+        self.bot = create_rate_limited_bot(self.config.bot_token)
         self.dp = Dispatcher()
         self.context = BotContext(self.bot, self.config)
         self.cache_service = ChatCacheService()
-        self.awaiting_channel_input = None  # Track if waiting for channel input
         self.bot_manager = BotManager()
         self.bot_id = "main"  # Identifier for the main bot
         self.child_bots = []  # Track spawned bots
@@ -151,17 +207,18 @@ class ForwarderBot(CacheObserver):
         
         self._setup_handlers()
         
-    def is_admin(self, user_id: int) -> bool:
-        """Check if user is an admin"""
-        return self.config.is_admin(user_id)
+    def _fsm_context(self, callback: types.CallbackQuery) -> FSMContext:
+        """Get FSM context of the user who pressed the button"""
+        return self.dp.fsm.get_context(
+            bot=self.bot,
+            chat_id=callback.message.chat.id,
+            user_id=callback.from_user.id
+        )
     
     async def clone_bot_prompt(self, callback: types.CallbackQuery):
         """Prompt for cloning the bot"""
-        if not self.is_admin(callback.from_user.id): 
-            return
-        
         # Set state to wait for new token
-        self.awaiting_clone_token = callback.from_user.id
+        await self._fsm_context(callback).set_state(CloneBotStates.waiting_token)
         
         kb = InlineKeyboardBuilder()
         kb.button(text="Отмена", callback_data="back_to_main")
@@ -180,33 +237,6 @@ class ForwarderBot(CacheObserver):
         await callback.answer()
 
 
-    # Let's also add the overwrite_clone method that was referenced earlier
-    async def overwrite_clone(self, callback: types.CallbackQuery):
-        """Handler for overwriting existing clone"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        # Parse data: overwrite_clone_dirname_token
-        parts = callback.data.split('_', 3)
-        if len(parts) != 4:
-            await callback.answer("Ошибка в данных")
-            return
-        
-        clone_dir = parts[2]
-        new_token = parts[3]
-        
-        # Delete existing clone
-        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        clone_path = os.path.join(os.path.dirname(current_dir), clone_dir)
-        
-        if os.path.exists(clone_path):
-            shutil.rmtree(clone_path)
-        
-        # Perform clone
-        await self._perform_bot_clone(new_token, clone_dir, callback.message)
-        await callback.answer()
-
-        
     async def _perform_bot_clone(self, new_token: str, clone_dir: str, progress_msg=None):
         """Perform the actual bot cloning"""
         try:
@@ -362,9 +392,6 @@ class ForwarderBot(CacheObserver):
 
     async def create_clone_files(self, callback: types.CallbackQuery):
         """Create clone files for separate deployment"""
-        if not self.is_admin(callback.from_user.id): 
-            return
-        
         # Parse data: clone_files_token
         parts = callback.data.split('_', 2)
         if len(parts) != 3:
@@ -417,9 +444,6 @@ class ForwarderBot(CacheObserver):
         await callback.answer()
     async def clone_bot_inline(self, callback: types.CallbackQuery):
         """Run cloned bot in the same solution"""
-        if not self.is_admin(callback.from_user.id): 
-            return
-        
         # Parse data: clone_inline_token
         parts = callback.data.split('_', 2)
         if len(parts) != 3:
@@ -491,9 +515,6 @@ class ForwarderBot(CacheObserver):
 
     async def manage_clones(self, callback: types.CallbackQuery):
         """Manage running bot clones"""
-        if not self.is_admin(callback.from_user.id): 
-            return
-        
         bots = self.bot_manager.list_bots()
         
         # Count clones (excluding main bot)
@@ -511,12 +532,14 @@ class ForwarderBot(CacheObserver):
                 reply_markup=kb.as_markup()
             )
         else:
-            text = "🤖 Запущенные боты:\n\n"
             kb = InlineKeyboardBuilder()
             
             # Show main bot info first
             main_info = bots.get("main", {})
-            text += f"• Основной бот\n  Статус: 🟢 Работает\n  PID: {main_info.get('pid', 'N/A')}\n\n"
+            blocks = [
+                "🤖 Запущенные боты:",
+                f"• Основной бот\n  Статус: 🟢 Работает\n  PID: {main_info.get('pid', 'N/A')}"
+            ]
             
             # Show clones
             for bot_id, info in bots.items():
@@ -532,7 +555,10 @@ class ForwarderBot(CacheObserver):
                 
                 # Extract bot username from bot_id
                 bot_username = bot_id.replace("bot_", "@")
-                text += f"• {bot_username}\n  Статус: {status}\n  PID: {info.get('pid', 'N/A')}\n  Запущен: {info.get('started_at', 'Неизвестно')}\n\n"
+                blocks.append(
+                    f"• {bot_username}\n  Статус: {status}\n  PID: {info.get('pid', 'N/A')}\n"
+                    f"  Запущен: {info.get('started_at', 'Неизвестно')}"
+                )
                 
                 if status == "🟢 Работает":
                     kb.button(text=f"Остановить {bot_username}", callback_data=f"stop_clone_{bot_id}")
@@ -543,15 +569,12 @@ class ForwarderBot(CacheObserver):
             kb.button(text="Назад", callback_data="back_to_main")
             kb.adjust(1)
             
-            await callback.message.edit_text(text, reply_markup=kb.as_markup())
+            await callback.message.edit_text("\n\n".join(blocks), reply_markup=kb.as_markup())
         
         await callback.answer()
 
     async def stop_clone(self, callback: types.CallbackQuery):
         """Stop a running bot clone"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
         bot_id = callback.data.replace("stop_clone_", "")
         
         try:
@@ -563,21 +586,15 @@ class ForwarderBot(CacheObserver):
         await self.manage_clones(callback)
 
     # Update the clone_bot_submit method to provide inline option
-    async def clone_bot_submit(self, message: types.Message):
+    async def clone_bot_submit(self, message: types.Message, state: FSMContext):
         """Handler for new bot token submission"""
-        if not self.is_admin(message.from_user.id): 
-            return
-        
-        if not hasattr(self, 'awaiting_clone_token') or self.awaiting_clone_token != message.from_user.id:
-            return
-        
         new_token = message.text.strip()
         
         if not new_token or ':' not in new_token:
             await message.reply("⚠️ Неверный формат токена.")
             return
         
-        self.awaiting_clone_token = None
+        await state.clear()
         
         # Verify the token
         try:
@@ -610,12 +627,8 @@ class ForwarderBot(CacheObserver):
             except Exception as e:
                 logger.error(f"Error stopping bot {bot_id}: {e}")
 
-    # Let's also add the overwrite_clone method that was referenced earlier
     async def overwrite_clone(self, callback: types.CallbackQuery):
         """Handler for overwriting existing clone"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
         # Parse data: overwrite_clone_dirname_token
         parts = callback.data.split('_', 3)
         if len(parts) != 4:
@@ -635,40 +648,28 @@ class ForwarderBot(CacheObserver):
         # Perform clone
         await self._perform_bot_clone(new_token, clone_dir, callback.message)
         await callback.answer()
+
     def _setup_handlers(self):
         """Initialize message handlers with Command pattern"""
-        # Admin command handlers
-        commands = {
-            "start": StartCommand(
-                isinstance(self.context.state, RunningState)
-            ),
-            "help": HelpCommand(),
-            "setlast": SetLastMessageCommand(
-                self.bot
-            ),
-            "getlast": GetLastMessageCommand(),
-            "forwardnow": ForwardNowCommand(
-                self.context
-            ),
-            "test": TestMessageCommand(
-                self.bot
-            ),
-            "findlast": FindLastMessageCommand(
-                self.bot
-            )
+        # Messages and buttons are handled only for admins; channel posts and
+        # membership updates come from other users and stay unfiltered
+        self.dp.message.filter(AdminFilter())
+        self.dp.callback_query.filter(AdminFilter())
+        
+        # Admin command handlers, registered behind a single Command filter
+        self._cmds = {
+            name: command_cls(*(getattr(self, dep) for dep in deps))
+            for name, command_cls, deps in _COMMAND_SPECS
         }
-        
-        for cmd_name, cmd_handler in commands.items():
-            self.dp.message.register(cmd_handler.execute, Command(cmd_name))
+        self.dp.message.register(self._dispatch_command, Command(*self._cmds))
     
         self.dp.message.register(
             self.add_channel_submit,
-            lambda message: message.from_user.id == self.awaiting_channel_input
+            AddChannelStates.waiting_channel
         )
         self.dp.message.register(
             self.clone_bot_submit,
-            lambda message: hasattr(self, 'awaiting_clone_token') and 
-                          self.awaiting_clone_token == message.from_user.id
+            CloneBotStates.waiting_token
         )
         # Register the direct add channel command
         self.dp.message.register(
@@ -690,9 +691,7 @@ class ForwarderBot(CacheObserver):
             "overwrite_clone_": self.overwrite_clone,
             "remove_channel_menu": self.remove_channel_menu,
             "remove_channel_page_": self.remove_channel_menu,  # Для пагинации удаления
-            "remove_channel_": self.remove_channel,  # Прямое удаление без подтверждения
             "channel_intervals_page_": self.manage_channel_intervals,  # Для пагинации интервалов
-            "remove_": self.remove_chat,  # Для удаления чатов (не каналов)
             "stats": self.show_stats,
             "list_chats": self.list_chats,
             "back_to_main": self.main_menu,
@@ -700,63 +699,92 @@ class ForwarderBot(CacheObserver):
             "manage_clones": self.manage_clones,
             "stop_clone_": self.stop_clone,
             "reorder_channels": self.reorder_channels,
-            "move_": self.move_channel,  # общий префикс для move_up_/move_down_
             "clone_files_": self.create_clone_files,
             "channels": self.manage_channels,
             "add_channel": self.add_channel_prompt,
             "channel_intervals": self.manage_channel_intervals,
         }
         
-        # Register handlers with specific order to avoid conflicts
-        for prefix, handler in callbacks.items():
-            self.dp.callback_query.register(
-                handler,
-                lambda c, p=prefix: c.data.startswith(p)
-            )
+        # Remove and reorder buttons carry typed callback data and are routed by its prefix
+        self.dp.callback_query.register(self.remove_chat, RemoveChatCallback.filter())
+        self.dp.callback_query.register(self.remove_channel, RemoveChannelCallback.filter())
+        self.dp.callback_query.register(self.move_channel, MoveChannelCallback.filter())
+        
+        # Longest prefixes first so that e.g. "interval_between_" wins over "interval_"
+        self._cb_table = tuple(sorted(callbacks.items(), key=lambda item: len(item[0]), reverse=True))
+        self.dp.callback_query.register(self._dispatch_callback)
+        
+        # Actions of the interval callbacks handled by set_interval
+        self._interval_actions = {
+            "between": self._show_channel_interval_options,
+            "set": self._apply_channel_interval,
+            "menu": self._show_interval_menu,
+            "global": self._apply_global_interval,
+        }
         
         # Handler for bot being added to chats
         self.dp.my_chat_member.register(self.handle_chat_member)
-        
-    async def reorder_channels(self, callback: types.CallbackQuery):
-        """Переход в режим сортировки каналов"""
-        if not self.is_admin(callback.from_user.id):
+
+    async def _edit_menu(
+        self,
+        callback: types.CallbackQuery,
+        text: str,
+        reply_markup: Optional[types.InlineKeyboardMarkup] = None
+    ):
+        """Edit menu message unless it already shows the same text and keyboard"""
+        message = callback.message
+        # Telegram strips surrounding whitespace and rejects edits that change nothing
+        if message.text == text.strip() and KeyboardFactory.same_markup(message.reply_markup, reply_markup):
             return
+        await message.edit_text(text, reply_markup=reply_markup)
+
+    def _state_flags(self) -> Tuple[bool, bool]:
+        """Return (is_running, auto_forward) for the main keyboard"""
+        running = self.context.is_running
+        return running, running and self.context.state.auto_forward
 
+    async def _dispatch_command(self, message: types.Message, command: CommandObject):
+        """Route command message to its Command object"""
+        await self._cmds[command.command].execute(message)
+
+    async def _dispatch_callback(self, callback: types.CallbackQuery):
+        """Route callback query to the handler with the longest matching prefix"""
+        data = callback.data or ""
+        for prefix, handler in self._cb_table:
+            if data.startswith(prefix):
+                return await handler(callback)
+
+    async def reorder_channels(self, callback: types.CallbackQuery):
+        """Переход в режим сортировки каналов"""
         channels = self.config.source_channels
+        # Читаемые названия из кэша чатов
+        titles = await self._get_channel_titles(channels)
         kb = InlineKeyboardBuilder()
         # Для каждого канала показываем ↑ и ↓
-        for i, ch in enumerate(channels):
-            # Получаем читаемое название
-            try:
-                title = (await self.bot.get_chat(ch)).title or ch
-            except:
-                title = ch
+        for ch in channels:
+            title = titles[ch]
             kb.button(
                 text=f"↑ {title}", 
-                callback_data=f"move_up_{ch}"
+                callback_data=MoveChannelCallback(direction="up", channel=ch).pack()
             )
             kb.button(
                 text=f"↓ {title}", 
-                callback_data=f"move_down_{ch}"
+                callback_data=MoveChannelCallback(direction="down", channel=ch).pack()
             )
         # Кнопки подтвердить или отменить
         kb.button(text="Готово",    callback_data="channels")
         kb.button(text="Отменить",  callback_data="channels")
         kb.adjust(2)
-        await callback.message.edit_text(
+        await self._edit_menu(
+            callback,
             "Измените порядок каналов, перемещая их вверх/вниз:",
             reply_markup=kb.as_markup()
         )
         await callback.answer()
 
-    async def move_channel(self, callback: types.CallbackQuery):
+    async def move_channel(self, callback: types.CallbackQuery, callback_data: MoveChannelCallback):
         """Обработчик кнопок ↑ и ↓: меняет порядок каналов"""
-        if not self.is_admin(callback.from_user.id):
-            return
-
-        data = callback.data  # e.g. "move_up_-1001234567890"
-        parts = data.split("_", 2)
-        direction, channel = parts[1], parts[2]
+        direction, channel = callback_data.direction, callback_data.channel
         lst = self.config.source_channels
 
         try:
@@ -774,227 +802,79 @@ class ForwarderBot(CacheObserver):
             return
 
         # Сохраняем новый порядок
-        self.config._save_channels_to_config()
+        self.config.schedule_channels_save()
 
         # Обновляем интерфейс сортировки
         await self.reorder_channels(callback)
 
-    async def find_latest_message(self, channel_id: str) -> Optional[int]:
-        """Helper method to find the latest valid message ID in a channel"""
-        try:
-            # Try to access more recent messages first
-            max_id = 10000  # Start with a reasonably high number
-            
-            for test_id in range(max_id, 0, -1):
-                try:
-                    # Try to get message info
-                    msg = await self.bot.get_messages(chat_id=channel_id, message_ids=test_id)
-                    if msg and not msg.empty:
-                        return test_id
-                except Exception:
-                    # Skip errors for non-existent messages
-                    pass
-                    
-                # Don't make too many attempts to avoid rate limits
-                if test_id % 1000 == 0:
-                    await asyncio.sleep(0.5)
-                    
-                # Don't check too many IDs
-                if max_id - test_id > 5000:
-                    break
-                    
-            return None
-        except Exception as e:
-            logger.error(f"Error finding latest message in channel {channel_id}: {e}")
-            return None
-            
-    async def find_last_message_handler(self, callback: types.CallbackQuery):
-        """Handler for finding last message button"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        channel_id = callback.data.replace("findlast_", "")
-        
-        await callback.message.edit_text(
-            f"🔍 Ищу последнее сообщение в канале {channel_id}...",
-            reply_markup=None
-        )
-        
-        try:
-            latest_id = await self.find_latest_message(channel_id)
-            
-            if latest_id:
-                await Repository.save_last_message(str(channel_id), latest_id)
-                
-                kb = InlineKeyboardBuilder()
-                kb.button(text="Назад к каналам", callback_data="channels")
-                
-                await callback.message.edit_text(
-                    f"✅ Найдено и сохранено последнее сообщение (ID: {latest_id}) в канале {channel_id}",
-                    reply_markup=kb.as_markup()
-                )
-            else:
-                kb = InlineKeyboardBuilder()
-                kb.button(text="Назад к каналам", callback_data="channels")
-                
-                await callback.message.edit_text(
-                    f"⚠️ Не удалось найти валидные сообщения в канале {channel_id}.",
-                    reply_markup=kb.as_markup()
-                )
-        except Exception as e:
-            kb = InlineKeyboardBuilder()
-            kb.button(text="Назад к каналам", callback_data="channels")
-            
-            await callback.message.edit_text(
-                f"❌ Ошибка при поиске последнего сообщения: {e}",
-                reply_markup=kb.as_markup()
-            )
-        
-        await callback.answer()
-        
-    async def add_channel_prompt(self, callback: types.CallbackQuery):
-        """Improved prompt to add a channel"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        # Create a keyboard with buttons for common channel types
-        kb = InlineKeyboardBuilder()
-        kb.button(text="🔄 Enter Channel ID/Username", callback_data="add_channel_input")
-        kb.button(text="Back", callback_data="channels")
-        kb.adjust(1)
-        
-        await callback.message.edit_text(
-            "Please select an option to add a channel:\n\n"
-            "• You can enter the channel ID (starts with -100...)\n"
-            "• Or the channel username (without @)\n\n"
-            "The bot must be an administrator in the channel.",
-            reply_markup=kb.as_markup()
-        )
-        await callback.answer()
-
     async def add_channel_input(self, callback: types.CallbackQuery):
         """Handler for channel ID/username input"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        self.awaiting_channel_input = callback.from_user.id
-        
-        kb = InlineKeyboardBuilder()
-        kb.button(text="Отмена", callback_data="channels")
+        await self._fsm_context(callback).set_state(AddChannelStates.waiting_channel)
         
         await callback.message.edit_text(
             "Пожалуйста, введите ID канала или username для добавления:\n\n"
             "• Для публичных каналов: введите username без @\n"
             "• Для приватных каналов: введите ID канала (начинается с -100...)\n\n"
             "Отправьте ID/username сообщением 💬",
-            reply_markup=kb.as_markup()
+            reply_markup=self._CANCEL_TO_CHANNELS_MARKUP
         )
         await callback.answer()
 
-    async def add_channel_submit(self, message: types.Message):
+    async def add_channel_submit(self, message: types.Message, state: FSMContext):
         """Handler for direct channel input message"""
-        if not self.is_admin(message.from_user.id):
-            return
-        
         channel = message.text.strip()
         
         if not channel:
             await message.reply("⚠️ ID/username канала не может быть пустым")
             return
         
-        self.awaiting_channel_input = None
+        await state.clear()
         
         progress_msg = await message.reply("🔄 Проверяю доступ к каналу...")
         
         try:
-            chat = await self.bot.get_chat(channel)
+            chat = await self.cache_service.get_chat_cached(self.bot, channel)
             
-            bot_id = (await self.bot.get_me()).id
-            member = await self.bot.get_chat_member(chat.id, bot_id)
+            member = await self.bot.get_chat_member(chat.id, self.bot.id)
             
-            if member.status != "administrator":
-                kb = InlineKeyboardBuilder()
-                kb.button(text="Назад к каналам", callback_data="channels")
-                
+            if member.status not in ADMIN_STATUSES:
                 await progress_msg.edit_text(
                     "⚠️ Бот должен быть администратором канала.\n"
                     "Пожалуйста, добавьте бота как администратора и попробуйте снова.",
-                    reply_markup=kb.as_markup()
+                    reply_markup=self._BACK_TO_CHANNELS_MARKUP
                 )
                 return
             
             if self.config.add_source_channel(str(chat.id)):
-                await progress_msg.edit_text(f"✅ Добавлен канал: {chat.title} ({chat.id})\n\n🔍 Теперь ищу последнее сообщение...")
-                
-                try:
-                    latest_id = await self.find_latest_message(str(chat.id))
-                    
-                    if latest_id:
-                        await Repository.save_last_message(str(chat.id), latest_id)
-                        
-                        kb = InlineKeyboardBuilder()
-                        kb.button(text="Назад к каналам", callback_data="channels")
-                        
-                        await progress_msg.edit_text(
-                            f"✅ Добавлен канал: {chat.title} ({chat.id})\n"
-                            f"✅ Найдено и сохранено последнее сообщение (ID: {latest_id})",
-                            reply_markup=kb.as_markup()
-                        )
-                    else:
-                        kb = InlineKeyboardBuilder()
-                        kb.button(text="Назад к каналам", callback_data="channels")
-                        
-                        await progress_msg.edit_text(
-                            f"✅ Добавлен канал: {chat.title} ({chat.id})\n"
-                            f"⚠️ Не удалось найти валидные сообщения. Будет использоваться следующее сообщение в канале.",
-                            reply_markup=kb.as_markup()
-                        )
-                except Exception as e:
-                    logger.error(f"Error finding latest message: {e}")
-                    
-                    kb = InlineKeyboardBuilder()
-                    kb.button(text="Назад к каналам", callback_data="channels")
-                    
-                    await progress_msg.edit_text(
-                        f"✅ Добавлен канал: {chat.title} ({chat.id})\n"
-                        f"⚠️ Ошибка при поиске последнего сообщения.",
-                        reply_markup=kb.as_markup()
-                    )
+                # Bot API не читает историю канала: последнее сообщение придет с новым channel_post
+                await progress_msg.edit_text(
+                    f"✅ Добавлен канал: {chat.title} ({chat.id})\n"
+                    "Пересылка начнется со следующего сообщения в канале.",
+                    reply_markup=self._BACK_TO_CHANNELS_MARKUP
+                )
             else:
-                kb = InlineKeyboardBuilder()
-                kb.button(text="Назад к каналам", callback_data="channels")
-                
                 await progress_msg.edit_text(
                     f"⚠️ Канал {chat.title} уже настроен.",
-                    reply_markup=kb.as_markup()
+                    reply_markup=self._BACK_TO_CHANNELS_MARKUP
                 )
-        except Exception as e:
-            kb = InlineKeyboardBuilder()
-            kb.button(text="Назад к каналам", callback_data="channels")
-            
+        except TelegramAPIError as e:
             await progress_msg.edit_text(
                 f"❌ Ошибка доступа к каналу: {e}\n\n"
                 "Убедитесь что:\n"
                 "• ID/username канала указан правильно\n"
                 "• Бот является участником канала\n"
                 "• Бот является администратором канала",
-                reply_markup=kb.as_markup()
+                reply_markup=self._BACK_TO_CHANNELS_MARKUP
             )
             logger.error(f"Failed to add channel {channel}: {e}")
 
     async def toggle_auto_forward(self, callback: types.CallbackQuery):
         """Handler for auto-forward toggle button"""
-        if not self.is_admin(callback.from_user.id):
-            return
-
-        if isinstance(self.context.state, RunningState):
+        if self.context.is_running:
             await self.context.state.toggle_auto_forward()
             await callback.message.edit_text(
                 "Main Menu:",
-                reply_markup=KeyboardFactory.create_main_keyboard(
-                    True, 
-                    self.context.state.auto_forward
-                )
+                reply_markup=KeyboardFactory.create_main_keyboard(*self._state_flags())
             )
         else:
             await callback.answer("Start forwarding first to enable auto-forward")
@@ -1003,27 +883,30 @@ class ForwarderBot(CacheObserver):
     
     async def toggle_forwarding(self, callback: types.CallbackQuery):
         """Handler for forwarding toggle button"""
-        if not self.is_admin(callback.from_user.id):
-            return
-
-        if isinstance(self.context.state, IdleState):
+        if not self.context.is_running:
             await self.context.start()
         else:
             await self.context.stop()
 
         await callback.message.edit_text(
-            f"Пересылка {'начата' if isinstance(self.context.state, RunningState) else 'остановлена'}!",
-            reply_markup=KeyboardFactory.create_main_keyboard(
-                isinstance(self.context.state, RunningState),
-                isinstance(self.context.state, RunningState) and self.context.state.auto_forward
-            )
+            f"Пересылка {'начата' if self.context.is_running else 'остановлена'}!",
+            reply_markup=KeyboardFactory.create_main_keyboard(*self._state_flags())
         )
         await callback.answer()
+
+    async def _get_channel_titles(self, channels: List[str]) -> Dict[str, str]:
+        """Resolve channel titles concurrently, falling back to the channel ID"""
+        chats = await asyncio.gather(
+            *(self.cache_service.get_chat_cached(self.bot, channel) for channel in channels),
+            return_exceptions=True
+        )
+        return {
+            channel: channel if isinstance(chat, Exception) else (chat.title or channel)
+            for channel, chat in zip(channels, chats)
+        }
+
     async def remove_channel_menu(self, callback: types.CallbackQuery):
         """Show channel removal menu with pagination"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
         source_channels = self.config.source_channels
         page = 0
         
@@ -1035,11 +918,10 @@ class ForwarderBot(CacheObserver):
                 page = 0
         
         if not source_channels:
-            await callback.message.edit_text(
+            await self._edit_menu(
+                callback,
                 "❌ Нет каналов для удаления.",
-                reply_markup=InlineKeyboardBuilder().button(
-                    text="🔙 К каналам", callback_data="channels"
-                ).as_markup()
+                reply_markup=self._TO_CHANNELS_MARKUP
             )
             await callback.answer()
             return
@@ -1049,15 +931,10 @@ class ForwarderBot(CacheObserver):
         text += "Выберите канал для удаления:"
         
         # Получаем информацию о каналах для создания клавиатуры
-        channel_info = {}
-        for channel in source_channels:
-            try:
-                chat = await self.bot.get_chat(channel)
-                channel_info[channel] = chat.title or channel
-            except Exception:
-                channel_info[channel] = channel
+        channel_info = await self._get_channel_titles(source_channels)
         
-        await callback.message.edit_text(
+        await self._edit_menu(
+            callback,
             text,
             reply_markup=KeyboardFactory.create_channel_removal_keyboard(source_channels, page, channel_info)
         )
@@ -1070,11 +947,10 @@ class ForwarderBot(CacheObserver):
         source_channels = self.config.source_channels
         
         if len(source_channels) < 2:
-            await callback.message.edit_text(
+            await self._edit_menu(
+                callback,
                 "Вам нужно минимум 2 канала для установки интервалов между ними.",
-                reply_markup=InlineKeyboardBuilder().button(
-                    text="🔙 К каналам", callback_data="channels"
-                ).as_markup()
+                reply_markup=self._TO_CHANNELS_MARKUP
             )
             await callback.answer()
             return
@@ -1091,16 +967,15 @@ class ForwarderBot(CacheObserver):
         current_intervals = await Repository.get_channel_intervals()
         
         # Получаем информацию о каналах (названия)
-        channel_info = {}
-        for channel in source_channels:
-            try:
-                chat = await self.bot.get_chat(channel)
-                channel_info[channel] = chat.title or channel
-            except Exception:
-                channel_info[channel] = channel
+        channel_info = await self._get_channel_titles(source_channels)
         
         # Создаем текст с информацией о текущих интервалах
-        text = "⏱️ Интервалы между каналами:\n\n(Если интервал не установлен используется глобальный интервал)\n\n"
+        lines = [
+            "⏱️ Интервалы между каналами:",
+            "",
+            "(Если интервал не установлен используется глобальный интервал)",
+            ""
+        ]
         
         channel_pairs = []
         for i, channel in enumerate(source_channels):
@@ -1124,13 +999,15 @@ class ForwarderBot(CacheObserver):
                         interval_str = f"{interval_seconds//3600}ч"
                     else:
                         interval_str = f"{interval_seconds//60}м"
-                    text += f"• {display_name1} → {display_name2}: {interval_str}\n"
+                    lines.append(f"• {display_name1} → {display_name2}: {interval_str}")
                 else:
-                    text += f"• {display_name1} → {display_name2}: не установлен\n"
+                    lines.append(f"• {display_name1} → {display_name2}: не установлен")
         
-        text += f"\nВыберите пару каналов для настройки:"
+        lines += ["", "Выберите пару каналов для настройки:"]
+        text = "\n".join(lines)
         
-        await callback.message.edit_text(
+        await self._edit_menu(
+            callback,
             text,
             reply_markup=KeyboardFactory.create_channel_interval_keyboard(
                 source_channels, page, channel_info, current_intervals
@@ -1138,219 +1015,116 @@ class ForwarderBot(CacheObserver):
         )
         await callback.answer()
 
-    async def set_channel_interval_prompt(self, callback: types.CallbackQuery):
-        """Prompt for setting interval between channels"""
-        if not self.is_admin(callback.from_user.id):
-            return
-            
-        # Parse the channel IDs from callback data
-        parts = callback.data.split('_')
-        if len(parts) >= 4:
-            channel1 = parts[2]
-            channel2 = parts[3]
-            
-            # Get channel names for display
-            try:
-                chat1 = await self.bot.get_chat(channel1)
-                chat2 = await self.bot.get_chat(channel2)
-                name1 = chat1.title or channel1
-                name2 = chat2.title or channel2
-            except Exception:
-                name1 = channel1
-                name2 = channel2
-            
-            await callback.message.edit_text(
-                f"Set interval between forwarding from:\n"
-                f"{name1} → {name2}",
-                reply_markup=KeyboardFactory.create_channel_interval_options(channel1, channel2)
-            )
-            await callback.answer()
-        else:
-            await callback.answer("Invalid channel selection")
-
-    async def set_channel_interval(self, callback: types.CallbackQuery):
-        """Set interval between two channels"""
-        if not self.is_admin(callback.from_user.id):
-            return
-            
-        # Parse data: set_interval_channel1_channel2_seconds
-        parts = callback.data.split('_')
-        if len(parts) >= 5:
-            channel1 = parts[2]
-            channel2 = parts[3]
-            interval = int(parts[4])
-            
-            # Save the interval
-            await Repository.set_channel_interval(channel1, channel2, interval)
-            
-            # Format interval for display
-            display = f"{interval//3600}h" if interval >= 3600 else f"{interval//60}m"
-            
-            # Get channel names for display
-            try:
-                chat1 = await self.bot.get_chat(channel1)
-                chat2 = await self.bot.get_chat(channel2)
-                name1 = chat1.title or channel1
-                name2 = chat2.title or channel2
-            except Exception:
-                name1 = channel1
-                name2 = channel2
-            
-            await callback.message.edit_text(
-                f"✅ Interval set to {display} between:\n"
-                f"{name1} → {name2}",
-                reply_markup=InlineKeyboardBuilder().button(
-                    text="Back to Intervals", callback_data="channel_intervals"
-                ).as_markup()
-            )
-            await callback.answer()
-        else:
-            await callback.answer("Invalid interval selection")
-
     async def set_interval(self, callback: types.CallbackQuery):
         """Handler for interval setting"""
-        if not self.is_admin(callback.from_user.id):
+        parsed = parse_interval_callback(callback.data)
+        if parsed is None:
+            await callback.answer("Неверный выбор интервала")
             return
+        
+        await self._interval_actions[parsed.action](callback, parsed)
 
-        data = callback.data
+    async def _show_channel_interval_options(self, callback: types.CallbackQuery, parsed: IntervalCallback):
+        """Show interval options for a pair of channels"""
+        channel1, channel2 = parsed.channel1, parsed.channel2
         
-        if "interval_between_" in data:
-            channel_parts = data.split('_')
-            if len(channel_parts) >= 4:
-                channel1 = channel_parts[2]
-                channel2 = channel_parts[3]
-                
-                try:
-                    chat1 = await self.bot.get_chat(channel1)
-                    chat2 = await self.bot.get_chat(channel2)
-                    name1 = chat1.title or channel1
-                    name2 = chat2.title or channel2
-                except Exception:
-                    name1 = channel1
-                    name2 = channel2
+        titles = await self._get_channel_titles([channel1, channel2])
+        name1, name2 = titles[channel1], titles[channel2]
+        
+        await callback.message.edit_text(
+            f"Установите интервал между пересылкой из:\n"
+            f"{name1} → {name2}",
+            reply_markup=KeyboardFactory.create_channel_interval_options(channel1, channel2)
+        )
+        await callback.answer()
+
+    async def _apply_channel_interval(self, callback: types.CallbackQuery, parsed: IntervalCallback):
+        """Save interval between a pair of channels"""
+        channel1, channel2, interval = parsed.channel1, parsed.channel2, parsed.seconds
+        
+        # Persist without delaying the reply; pending writes are awaited on shutdown
+        self.context._run_in_background(Repository.set_channel_interval(channel1, channel2, interval))
+        
+        display = f"{interval//3600}ч" if interval >= 3600 else f"{interval//60}м"
+        
+        titles = await self._get_channel_titles([channel1, channel2])
+        name1, name2 = titles[channel1], titles[channel2]
+        
+        await callback.message.edit_text(
+            f"✅ Интервал установлен на {display} между:\n"
+            f"{name1} → {name2}",
+            reply_markup=self._BACK_TO_INTERVALS_MARKUP
+        )
+        await callback.answer()
+
+    async def _show_interval_menu(self, callback: types.CallbackQuery, parsed: IntervalCallback):
+        """Show global repost interval selection"""
+        # Получаем текущий интервал
+        current_interval = await Repository.get_config("repost_interval", "3600")
+        try:
+            current_seconds = int(current_interval)
+            
+            # Форматируем текущий интервал для отображения
+            if current_seconds >= 3600:
+                current_display = f"{current_seconds // 3600}ч"
+            else:
+                current_display = f"{current_seconds // 60}м"
+        except (ValueError, TypeError):
+            current_display = "60м"  # По умолчанию
+            
+        await callback.message.edit_text(
+            f"Текущий интервал: {current_display}\n\n"
+            "Выберите новый интервал повторной отправки:",
+            reply_markup=KeyboardFactory.create_interval_keyboard()
+        )
+
+    async def _apply_global_interval(self, callback: types.CallbackQuery, parsed: IntervalCallback):
+        """Save global repost interval"""
+        interval = parsed.seconds
+        try:
+            await Repository.set_config("repost_interval", str(interval))
+            
+            if self.context.is_running:
+                self.context.state.interval = interval
                 
-                await callback.message.edit_text(
-                    f"Установите интервал между пересылкой из:\n"
-                    f"{name1} → {name2}",
-                    reply_markup=KeyboardFactory.create_channel_interval_options(channel1, channel2)
+                now = time.time()
+                self.context.state._channel_last_post.update(
+                    dict.fromkeys(self.context.config.source_channels, now)
                 )
-                await callback.answer()
-            else:
-                await callback.answer("Неверный выбор канала")
-        elif "set_interval_" in data:
-            parts = data.split('_')
-            if len(parts) >= 5:
-                channel1 = parts[2]
-                channel2 = parts[3]
-                interval = int(parts[4])
                 
-                await Repository.set_channel_interval(channel1, channel2, interval)
+                self.context.state._last_global_post_time = now
+                self.context.state.wake_repost()
                 
                 display = f"{interval//3600}ч" if interval >= 3600 else f"{interval//60}м"
-                
-                try:
-                    chat1 = await self.bot.get_chat(channel1)
-                    chat2 = await self.bot.get_chat(channel2)
-                    name1 = chat1.title or channel1
-                    name2 = chat2.title or channel2
-                except Exception:
-                    name1 = channel1
-                    name2 = channel2
-                
                 await callback.message.edit_text(
-                    f"✅ Интервал установлен на {display} между:\n"
-                    f"{name1} → {name2}",
-                    reply_markup=InlineKeyboardBuilder().button(
-                        text="Назад к интервалам", callback_data="channel_intervals"
-                    ).as_markup()
+                    f"Интервал установлен на {display}. Первая отправка произойдет через этот интервал.",
+                    reply_markup=KeyboardFactory.create_main_keyboard(*self._state_flags())
                 )
-                await callback.answer()
-            else:
-                await callback.answer("Неверный выбор интервала")
-        
-        # Regular global interval setting
-        if data == "interval_menu":
-            # Получаем текущий интервал
-            current_interval = await Repository.get_config("repost_interval", "3600")
-            try:
-                current_seconds = int(current_interval)
-                
-                # Форматируем текущий интервал для отображения
-                if current_seconds >= 3600:
-                    current_display = f"{current_seconds // 3600}ч"
-                else:
-                    current_display = f"{current_seconds // 60}м"
-            except (ValueError, TypeError):
-                current_display = "60м"  # По умолчанию
-                
-            await callback.message.edit_text(
-                f"Текущий интервал: {current_display}\n\n"
-                "Выберите новый интервал повторной отправки:",
-                reply_markup=await KeyboardFactory.create_interval_keyboard()  # <-- Добавлен await здесь
-            )
-        elif data.startswith("interval_") and not "between" in data and not "menu" in data:
-            try:
-                interval = int(data.split("_")[1])
-                
-                await Repository.set_config("repost_interval", str(interval))
                 
-                if isinstance(self.context.state, RunningState):
-                    self.context.state.interval = interval
-                    
-                    now = datetime.now().timestamp()
-                    for channel in self.context.config.source_channels:
-                        self.context.state._channel_last_post[channel] = now
-                    
-                    self.context.state._last_global_post_time = now
-                    
-                    display = f"{interval//3600}ч" if interval >= 3600 else f"{interval//60}м"
-                    await callback.message.edit_text(
-                        f"Интервал установлен на {display}. Первая отправка произойдет через этот интервал.",
-                        reply_markup=KeyboardFactory.create_main_keyboard(
-                            True, 
-                            self.context.state.auto_forward
-                        )
-                    )
-                    
-                    logger.info(f"Установлен интервал пересылки {interval} секунд ({interval//60} минут)")
-                else:
-                    display = f"{interval//3600}ч" if interval >= 3600 else f"{interval//60}м"
-                    await callback.message.edit_text(
-                        f"Интервал установлен на {display}",
-                        reply_markup=KeyboardFactory.create_main_keyboard(
-                            False, 
-                            False
-                        )
+                logger.info(f"Установлен интервал пересылки {interval} секунд ({interval//60} минут)")
+            else:
+                display = f"{interval//3600}ч" if interval >= 3600 else f"{interval//60}м"
+                await callback.message.edit_text(
+                    f"Интервал установлен на {display}",
+                    reply_markup=KeyboardFactory.create_main_keyboard(
+                        False, 
+                        False
                     )
-            except Exception as e:
-                logger.error(f"Ошибка установки интервала: {e}")
-                await callback.answer("Ошибка установки интервала")
+                )
+        except Exception as e:
+            logger.error(f"Ошибка установки интервала: {e}")
+            await callback.answer("Ошибка установки интервала")
 
-    async def remove_chat(self, callback: types.CallbackQuery):
+    async def remove_chat(self, callback: types.CallbackQuery, callback_data: RemoveChatCallback):
         """Handler for chat removal"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        # Check if this is for removing a chat, not a channel
-        if not callback.data.startswith("remove_") or callback.data.startswith("remove_channel_"):
-            await callback.answer("Эта команда только для удаления чатов")
-            return
-        
-        try:
-            chat_id = int(callback.data.split("_")[1])
-            await Repository.remove_target_chat(chat_id)
-            self.cache_service.remove_from_cache(chat_id)
-            await self.list_chats(callback)
-            await callback.answer("Чат удален!")
-        except ValueError:
-            await callback.answer("Ошибка при удалении чата")
-            logger.error(f"Invalid chat_id in callback data: {callback.data}")
+        chat_id = callback_data.chat_id
+        await Repository.remove_target_chat(chat_id)
+        self.cache_service.remove_from_cache(chat_id)
+        await self.list_chats(callback)
+        await callback.answer("Чат удален!")
 
     async def show_stats(self, callback: types.CallbackQuery):
         """Handler for statistics display"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
         stats = await Repository.get_stats()
         text = (
             "📊 Статистика пересылки\n\n"
@@ -1369,27 +1143,35 @@ class ForwarderBot(CacheObserver):
         else:
             text += "Нет"
         
-        await callback.message.edit_text(
+        await self._edit_menu(
+            callback,
             text,
-            reply_markup=KeyboardFactory.create_main_keyboard(
-                isinstance(self.context.state, RunningState),
-                isinstance(self.context.state, RunningState) and self.context.state.auto_forward
-            )
+            reply_markup=KeyboardFactory.create_main_keyboard(*self._state_flags())
         )
         await callback.answer()
 
     async def list_chats(self, callback: types.CallbackQuery):
         """Handler for chat listing"""
-        if not self.is_admin(callback.from_user.id):
-            return
+        chats = await Repository.get_target_chat_titles()
         
-        chats = await Repository.get_target_chats()
-        chat_info = {}
-        
-        for chat_id in chats:
-            info = await self.cache_service.get_chat_info(self.bot, chat_id)
-            if info:
-                chat_info[chat_id] = info.title
+        # Titles are stored with the chats; only chats without one are fetched, concurrently
+        missing = [chat_id for chat_id, title in chats.items() if not title]
+        infos = await asyncio.gather(
+            *(self.cache_service.get_chat_info(self.bot, chat_id) for chat_id in missing),
+            return_exceptions=True
+        )
+        fetched = {
+            chat_id: info.title
+            for chat_id, info in zip(missing, infos)
+            if info and not isinstance(info, Exception) and info.title
+        }
+        if fetched:
+            self.context._run_in_background(Repository.set_target_chat_titles(fetched))
+        chat_info = {
+            chat_id: title or fetched[chat_id]
+            for chat_id, title in chats.items()
+            if title or chat_id in fetched
+        }
         
         if not chats:
             text = (
@@ -1398,40 +1180,31 @@ class ForwarderBot(CacheObserver):
                 "1. Бот добавлен в целевые чаты\n"
                 "2. Бот является администратором в исходных каналах"
             )
-            markup = KeyboardFactory.create_main_keyboard(
-                isinstance(self.context.state, RunningState),
-                isinstance(self.context.state, RunningState) and self.context.state.auto_forward
-            )
+            markup = KeyboardFactory.create_main_keyboard(*self._state_flags())
         else:
-            text = "📡 Целевые чаты:\n\n"
-            for chat_id, title in chat_info.items():
-                text += f"• {title} ({chat_id})\n"
+            lines = ["📡 Целевые чаты:", ""]
+            lines.extend(f"• {title} ({chat_id})" for chat_id, title in chat_info.items())
+            text = "\n".join(lines)
             markup = KeyboardFactory.create_chat_list_keyboard(chat_info)
         
-        await callback.message.edit_text(text, reply_markup=markup)
+        await self._edit_menu(callback, text, reply_markup=markup)
         await callback.answer()
 
     async def main_menu(self, callback: types.CallbackQuery):
         """Handler for main menu button"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        await callback.message.edit_text(
+        # Cancel any pending input, e.g. a clone token prompt
+        await self._fsm_context(callback).clear()
+        await self._edit_menu(
+            callback,
             "Main Menu:",
-            reply_markup=KeyboardFactory.create_main_keyboard(
-                isinstance(self.context.state, RunningState),
-                isinstance(self.context.state, RunningState) and self.context.state.auto_forward
-            )
+            reply_markup=KeyboardFactory.create_main_keyboard(*self._state_flags())
         )
         await callback.answer()
 
     async def manage_channels(self, callback: types.CallbackQuery):
         """Channel management menu"""
-        if not self.is_admin(callback.from_user.id):
-            return
-                
         # Reset any channel input state
-        self.awaiting_channel_input = None
+        await self._fsm_context(callback).clear()
         
         source_channels = self.config.source_channels
         
@@ -1441,104 +1214,42 @@ class ForwarderBot(CacheObserver):
                 "Добавьте канал, нажав кнопку ниже."
             )
         else:
-            text = "📡 Исходные каналы:\n\n"
+            # Resolve all titles concurrently through the chat cache
+            titles = await self._get_channel_titles(source_channels)
+            lines = ["📡 Исходные каналы:", ""]
             for channel in source_channels:
-                # Try to get chat info for better display
-                try:
-                    chat = await self.bot.get_chat(channel)
-                    if chat.title:
-                        text += f"• {chat.title} ({channel})\n"
-                    else:
-                        text += f"• {channel}\n"
-                except Exception:
-                    text += f"• {channel}\n"
+                title = titles[channel]
+                lines.append(f"• {title} ({channel})" if title != channel else f"• {channel}")
+            text = "\n".join(lines)
         
         # Use KeyboardFactory to create management keyboard
         markup = KeyboardFactory.create_channel_management_keyboard(source_channels)
         
-        await callback.message.edit_text(text, reply_markup=markup)
+        await self._edit_menu(callback, text, reply_markup=markup)
         await callback.answer()
 
     async def add_channel_prompt(self, callback: types.CallbackQuery):
         """Improved prompt to add a channel without command"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
         # Set state to wait for channel input
-        self.awaiting_channel_input = callback.from_user.id
+        await self._fsm_context(callback).set_state(AddChannelStates.waiting_channel)
         
         # Create a keyboard with cancel button
-        kb = InlineKeyboardBuilder()
-        kb.button(text="Отмена", callback_data="channels")
-        
         await callback.message.edit_text(
             "Введите ID канала или его username для добавления:\n\n"
             "• Для публичных каналов: введите username без @\n"
             "• Для приватных каналов: введите ID канала (начинается с -100...)\n\n"
             "Просто отправьте ID канала или username сообщением 💬",
-            reply_markup=kb.as_markup()
+            reply_markup=self._CANCEL_TO_CHANNELS_MARKUP
         )
         await callback.answer()
 
-    async def add_channel_handler(self, message: types.Message):
-        """Handle channel addition from user input"""
-        logger.info(f"Received channel addition message: {message.text}")
-        channel = message.text.strip()
-        
-        if not channel:
-            await message.reply("⚠️ Channel ID/username cannot be empty")
-            return
-            
-        # Verify that bot can access the channel
-        try:
-            # Try to get basic info about the channel
-            chat = await self.bot.get_chat(channel)
-            
-            # Check if bot is an admin in the channel
-            bot_id = (await self.bot.get_me()).id
-            member = await self.bot.get_chat_member(chat.id, bot_id)
-            
-            if member.status != "administrator":
-                await message.reply(
-                    "⚠️ Bot must be an administrator in the channel to forward messages.\n"
-                    "Please add the bot as admin and try again."
-                )
-                return
-                
-            # Add channel to configuration
-            if self.config.add_source_channel(str(chat.id)):
-                await message.reply(
-                    f"✅ Successfully added channel: {chat.title} ({chat.id})"
-                )
-                logger.info(f"Added channel: {chat.title} ({chat.id})")
-            else:
-                await message.reply("⚠️ This channel is already configured")
-                
-        except Exception as e:
-            await message.reply(
-                f"❌ Error accessing channel: {e}\n\n"
-                "Make sure:\n"
-                "• The channel ID/username is correct\n"
-                "• The bot is a member of the channel\n"
-                "• The bot is an administrator in the channel"
-            )
-            logger.error(f"Failed to add channel {channel}: {e}")
-
-    async def remove_channel(self, callback: types.CallbackQuery):
+    async def remove_channel(self, callback: types.CallbackQuery, callback_data: RemoveChannelCallback):
         """Remove a source channel directly without confirmation"""
-        if not self.is_admin(callback.from_user.id):
-            return
-        
-        # Извлекаем ID канала из callback_data
-        if not callback.data.startswith("remove_channel_"):
-            await callback.answer("Неверный формат данных")
-            return
-        
-        channel = callback.data.replace("remove_channel_", "")
+        channel = callback_data.channel
         
         # Получаем название канала для уведомления
         try:
-            chat = await self.bot.get_chat(channel)
+            chat = await self.cache_service.get_chat_cached(self.bot, channel)
             channel_name = chat.title or channel
         except Exception:
             channel_name = channel
@@ -1548,6 +1259,8 @@ class ForwarderBot(CacheObserver):
         
         # Удаляем канал
         if self.config.remove_source_channel(channel):
+            self.cache_service.remove_from_cache(channel)
+            
             # Также удаляем связанные интервалы
             try:
                 await Repository.delete_channel_interval(channel)
@@ -1563,27 +1276,21 @@ class ForwarderBot(CacheObserver):
     
     async def handle_channel_post(self, message: types.Message | None):
         """Обработчик сообщений из канала с учетом ожидания интервала"""
+        # Per-post logs pass arguments to loguru, which formats them only if the level is enabled
         if message is None:
             return
                 
         chat_id = str(message.chat.id)
         username = message.chat.username
-        source_channels = self.config.source_channels
-                
-        is_source = False
-        for channel in source_channels:
-            if channel == chat_id or (username and channel.lower() == username.lower()):
-                is_source = True
-                break
                     
-        if not is_source:
-            logger.info(f"Сообщение не из канала-источника: {chat_id}/{username}")
+        if not self.config.is_source_channel(chat_id, username):
+            logger.info("Сообщение не из канала-источника: {}/{}", chat_id, username)
             return
         
-        # Сохраняем последний ID сообщения для канала
-        await Repository.save_last_message(chat_id, message.message_id)
+        # Сохраняем последний ID сообщения для канала (пакетная запись в фоне)
+        Repository.queue_last_message(chat_id, message.message_id)
         
-        if isinstance(self.context.state, RunningState):
+        if self.context.is_running:
             # Проверка, находимся ли мы в периоде ожидания для этого канала
             now = datetime.now().timestamp()
             last_post_time = self.context.state._channel_last_post.get(chat_id, 0)
@@ -1604,8 +1311,8 @@ class ForwarderBot(CacheObserver):
             # Если канал ожидает интервала или не является следующим в последовательности,
             # просто сохраняем сообщение для будущей обработки
             if waiting_interval and not is_next_in_sequence:
-                logger.info(f"Получено новое сообщение {message.message_id} из канала {chat_id} в период ожидания. "
-                            f"Сообщение будет обработано при следующей пересылке.")
+                logger.info("Получено новое сообщение {} из канала {} в период ожидания. "
+                            "Сообщение будет обработано при следующей пересылке.", message.message_id, chat_id)
                 
                 # Добавляем информацию в структуру ожидающих сообщений
                 if chat_id not in self.context.state._pending_messages:
@@ -1619,11 +1326,11 @@ class ForwarderBot(CacheObserver):
                 
             # Проверяем, включена ли автопересылка
             if not self.context.state.auto_forward:
-                logger.info(f"Получено новое сообщение из канала {chat_id}, но автопересылка отключена. Сообщение сохранено.")
+                logger.info("Получено новое сообщение из канала {}, но автопересылка отключена. Сообщение сохранено.", chat_id)
                 return
                 
             # Проводим стандартную обработку, если не в периоде ожидания
-            logger.info(f"Параллельная проверка и последовательная пересылка сообщений из канала {chat_id}")
+            logger.info("Параллельная проверка и последовательная пересылка сообщений из канала {}", chat_id)
             
             # Определяем диапазон ID сообщений для пересылки
             max_id = message.message_id
@@ -1646,7 +1353,7 @@ class ForwarderBot(CacheObserver):
             for msg_id in message_ids:
                 msg_key = f"{chat_id}:{msg_id}"
                 if msg_key in self.context._temp_unavailable_messages:
-                    logger.debug(f"Пропуск недавно недоступного сообщения {msg_id} из канала {chat_id}")
+                    logger.debug("Пропуск недавно недоступного сообщения {} из канала {}", msg_id, chat_id)
                     continue
                 
                 # Создаем задачу проверки доступности сообщения
@@ -1713,14 +1420,16 @@ class ForwarderBot(CacheObserver):
         is_member = update.new_chat_member.status in ['member', 'administrator']
         
         if is_member and update.chat.type in ['group', 'supergroup']:
-            await Repository.add_target_chat(chat_id)
+            await Repository.add_target_chat(chat_id, update.chat.title)
             self.cache_service.remove_from_cache(chat_id)
-            await self._notify_admins(f"Бот добавлен в {update.chat.type}: {update.chat.title} ({chat_id})")
+            self.context._run_in_background(
+                self._notify_admins(f"Бот добавлен в {update.chat.type}: {update.chat.title} ({chat_id})")
+            )
             logger.info(f"Бот добавлен в {update.chat.type}: {update.chat.title} ({chat_id})")
         elif not is_member:
             await Repository.remove_target_chat(chat_id)
             self.cache_service.remove_from_cache(chat_id)
-            await self._notify_admins(f"Бот удален из чата {chat_id}")
+            self.context._run_in_background(self._notify_admins(f"Бот удален из чата {chat_id}"))
             logger.info(f"Бот удален из чата {chat_id}")
 
     async def _notify_owner(self, message: str):
@@ -1748,59 +1457,58 @@ class ForwarderBot(CacheObserver):
         
         logger.info("Бот успешно запущен!")
         try:
-            # Get the last update ID to avoid duplicates
-            offset = 0
-            try:
-                updates = await self.bot.get_updates(limit=1, timeout=1)
-                if updates:
-                    offset = updates[-1].update_id + 1
-            except Exception as e:
-                logger.warning(f"Не удалось получить начальные обновления: {e}")
-
-            await self.dp.start_polling(self.bot, offset=offset)
+            await self.dp.start_polling(self.bot)
         finally:
             self.cache_service.remove_observer(self)
             await self.bot.session.close()
 
 # Update the bottom of bot.py with proper Windows multiprocessing support
 
+def _acquire_instance_lock(lock_file: str) -> Optional[int]:
+    """Lock the instance file; returns its descriptor or None if another instance holds it"""
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if sys.platform.startswith('win'):
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    
+    # PID is only informational, the OS releases the lock when the process exits
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    return fd
+
 # Update the main function to handle cleanup
 async def main():
     """Main entry point with improved error handling"""
     lock_file = "bot.lock"
     bot = None
     
-    if os.path.exists(lock_file):
-        try:
-            with open(lock_file, 'r') as f:
-                pid = int(f.read().strip())
-            
-            import psutil
-            if psutil.pid_exists(pid):
-                logger.error(f"Another instance is running (PID: {pid})")
-                return
-            os.remove(lock_file)
-            logger.info("Cleaned up stale lock file")
-        except Exception as e:
-            logger.warning(f"Error handling lock file: {e}")
-            if os.path.exists(lock_file):
-                os.remove(lock_file)
+    lock_fd = _acquire_instance_lock(lock_file)
+    if lock_fd is None:
+        logger.error("Another instance is running")
+        return
 
     try:
-        with open(lock_file, 'w') as f:
-            f.write(str(os.getpid()))
-
         bot = ForwarderBot()
         await bot.start()
     finally:
         try:
             if bot:
                 await bot.cleanup()  # Stop all child bots
-            await Repository.close_db()
-            if os.path.exists(lock_file):
-                os.remove(lock_file)
+                await _shutdown_storage(bot)
+            else:
+                await Repository.close_db()
+            Config().save_pending_channels()
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
+        finally:
+            os.close(lock_fd)
 
 # Main entry point with proper Windows multiprocessing support
 if __name__ == "__main__":
@@ -1811,7 +1519,10 @@ if __name__ == "__main__":
         multiprocessing.set_start_method('spawn', force=True)  # Use spawn for all platforms for consistency
     
     try:
-        asyncio.run(main())
+        if uvloop:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Бот остановлен пользователем")
     except Exception as e:
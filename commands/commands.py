@@ -1,11 +1,31 @@
+import asyncio
+import re
+import time
 from aiogram import types
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 from loguru import logger
 from .base_command import Command
 from database.repository import Repository
+from utils.bot_state import is_missing_message_error
 from utils.keyboard_factory import KeyboardFactory
-from utils.bot_state import IdleState, RunningState
-from utils.config import Config
+
+# Minimum seconds between progress message edits (editMessageText is rate limited per chat)
+PROGRESS_EDIT_INTERVAL = 2.0
+
+# Service messages exist but cannot be copied
+_UNCOPYABLE_MSG_RE = re.compile(r"message can't be copied", re.IGNORECASE)
+
+async def _check_forwardable(bot, user_id: int, channel_id: str, message_id: int) -> None:
+    """Forward a message silently to the user and delete it right away (errors are propagated)"""
+    forwarded = await bot.forward_message(
+        chat_id=user_id,
+        from_chat_id=channel_id,
+        message_id=message_id,
+        disable_notification=True
+    )
+    try:
+        await bot.delete_message(chat_id=user_id, message_id=forwarded.message_id)
+    except Exception:
+        pass
 
 class StartCommand(Command):
     def __init__(self, running: bool = False):
@@ -52,17 +72,17 @@ class SetLastMessageCommand(Command):
             message_id = int(args[2])
             
             try:
-                test_msg = await self.bot.forward_message(
-                    chat_id=message.from_user.id,
-                    from_chat_id=channel_id,
-                    message_id=message_id
-                )
-                
-                await Repository.save_last_message(channel_id, message_id)
-                await message.answer(f"✅ Сообщение ID {message_id} из канала {channel_id} проверено и сохранено.")
-            
+                await _check_forwardable(self.bot, message.from_user.id, channel_id, message_id)
             except Exception as e:
                 await message.answer(f"⚠️ Не удалось проверить сообщение в канале {channel_id}: {e}")
+                return
+            
+            try:
+                await Repository.save_last_message(channel_id, message_id)
+            except Exception as e:
+                await message.answer(f"❌ Сообщение проверено, но не сохранено: {e}")
+                return
+            await message.answer(f"✅ Сообщение ID {message_id} из канала {channel_id} проверено и сохранено.")
         
         except ValueError:
             await message.answer("❌ ID сообщения должен быть числом")
@@ -122,11 +142,7 @@ class TestMessageCommand(Command):
             progress_msg = await message.answer(f"🔍 Проверяю сообщение {message_id} в канале {channel_id}...")
             
             try:
-                test_msg = await self.bot.forward_message(
-                    chat_id=message.from_user.id,
-                    from_chat_id=channel_id,
-                    message_id=message_id
-                )
+                await _check_forwardable(self.bot, message.from_user.id, channel_id, message_id)
                 await progress_msg.edit_text(f"✅ Сообщение {message_id} в канале {channel_id} существует и может быть переслано.")
             except Exception as e:
                 await progress_msg.edit_text(f"❌ Ошибка: {e}")
@@ -138,6 +154,37 @@ class FindLastMessageCommand(Command):
         super().__init__()
         self.bot = bot
 
+    @staticmethod
+    async def _edit_progress(progress_msg: types.Message, text: str) -> None:
+        """Edit progress message, ignoring errors"""
+        try:
+            await progress_msg.edit_text(text)
+        except Exception:
+            pass
+
+    async def _message_exists(self, user_id: int, channel_id: str, msg_id: int) -> bool:
+        """Probe a message by copying it silently to the user and deleting the copy"""
+        try:
+            copied = await self.bot.copy_message(
+                chat_id=user_id,
+                from_chat_id=channel_id,
+                message_id=msg_id,
+                disable_notification=True
+            )
+        except Exception as e:
+            error_text = str(e)
+            if _UNCOPYABLE_MSG_RE.search(error_text):
+                # Service messages exist but cannot be copied
+                return True
+            if not is_missing_message_error(error_text):
+                logger.warning(f"Unexpected error checking message {msg_id} in channel {channel_id}: {e}")
+            return False
+        try:
+            await self.bot.delete_message(chat_id=user_id, message_id=copied.message_id)
+        except Exception:
+            pass
+        return True
+
     async def _handle(self, message: types.Message) -> None:
         args = message.text.split()
         
@@ -162,38 +209,41 @@ class FindLastMessageCommand(Command):
         valid_id = None
         checked_count = 0
         max_check = 100
+        last_edit = time.monotonic()
+        progress_edit = None
 
-        for msg_id in range(current_id + 10, current_id - max_check, -1):
-            if msg_id <= 0:
-                break
+        # Binary search for the highest existing ID in the same window the linear scan covered
+        low, high = max(1, current_id - max_check + 1), current_id + 10
+        while low <= high:
+            msg_id = (low + high) // 2
 
             checked_count += 1
-            if checked_count % 10 == 0:
-                try:
-                    await progress_msg.edit_text(f"⏳ Проверено {checked_count} сообщений...")
-                except Exception:
-                    pass
-
-            try:
-                msg = await self.bot.forward_message(
-                    chat_id=message.from_user.id,
-                    from_chat_id=channel_id,
-                    message_id=msg_id
+            if time.monotonic() - last_edit > PROGRESS_EDIT_INTERVAL:
+                last_edit = time.monotonic()
+                # Progress is edited in the background so probing doesn't wait for it
+                progress_edit = asyncio.create_task(
+                    self._edit_progress(progress_msg, f"⏳ Проверено {checked_count} сообщений...")
                 )
+
+            if await self._message_exists(message.from_user.id, channel_id, msg_id):
                 valid_id = msg_id
-                break
-            except Exception as e:
-                if "message not found" in str(e).lower():
-                    continue
-                logger.warning(f"Unexpected error checking message {msg_id} in channel {channel_id}: {e}")
+                low = msg_id + 1
+            else:
+                high = msg_id - 1
 
+        if progress_edit:
+            await progress_edit
         try:
             await progress_msg.delete()
         except Exception:
             pass
 
         if valid_id:
-            await Repository.save_last_message(channel_id, valid_id)
+            try:
+                await Repository.save_last_message(channel_id, valid_id)
+            except Exception as e:
+                await message.answer(f"❌ Найдено сообщение (ID: {valid_id}) в канале {channel_id}, но сохранить его не удалось: {e}")
+                return
             await message.answer(
                 f"✅ Найдено валидное сообщение (ID: {valid_id}) в канале {channel_id} после проверки {checked_count} сообщений."
             )
@@ -1,7 +1,6 @@
 import asyncio
-import weakref
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import time
+from typing import Optional, List, Dict, Any, Set, Tuple
 import aiosqlite
 from contextlib import asynccontextmanager
 from loguru import logger
@@ -9,7 +8,23 @@ from utils.config import Config
 
 class DatabaseConnectionPool:
     """Connection pool manager"""
-    _pool = weakref.WeakSet()
+    # Strong references: aiosqlite stops connections that get garbage collected
+    _pool: Set[aiosqlite.Connection] = set()
+    _released: Optional[asyncio.Condition] = None
+    
+    @staticmethod
+    async def _connect(db_path: str) -> aiosqlite.Connection:
+        """Open a new connection tuned for frequent small writes"""
+        conn = await aiosqlite.connect(db_path)
+        # WAL lets readers work during writes; NORMAL sync is safe with WAL and skips most fsyncs.
+        # Pooled connections live for the whole run, so a larger page cache (64 MB) keeps the data in memory
+        await conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+        """)
+        return conn
     
     @classmethod
     async def close_all(cls):
@@ -20,52 +35,79 @@ class DatabaseConnectionPool:
             except Exception as e:
                 logger.error(f"Error closing connection: {e}")
         cls._pool.clear()
+        cls._released = None
     
     @classmethod
     @asynccontextmanager
     async def get_connection(cls):
         """Get a database connection from the pool"""
+        conn = await cls._acquire()
+        try:
+            yield conn
+        finally:
+            await cls._release(conn)
+
+    @classmethod
+    async def _acquire(cls) -> aiosqlite.Connection:
         config = Config()
+        if cls._released is None:
+            cls._released = asyncio.Condition()
         
-        # Try to get an available connection
-        for conn in cls._pool:
-            if not conn.in_use:
-                conn.in_use = True
-                try:
-                    yield conn
-                finally:
-                    conn.in_use = False
-                return
-
-        # Create new connection if pool not full
-        if len(cls._pool) < config.max_db_connections:
-            conn = await aiosqlite.connect(config.db_path)
-            conn.in_use = True
-            cls._pool.add(conn)
-            try:
-                yield conn
-            finally:
-                conn.in_use = False
-        else:
-            # Wait for available connection
+        async with cls._released:
             while True:
-                await asyncio.sleep(0.1)
+                # Try to get an available connection
                 for conn in cls._pool:
                     if not conn.in_use:
                         conn.in_use = True
-                        try:
-                            yield conn
-                        finally:
-                            conn.in_use = False
-                        return
+                        return conn
+                
+                # Create new connection if pool not full
+                if len(cls._pool) < config.max_db_connections:
+                    conn = await cls._connect(config.db_path)
+                    conn.in_use = True
+                    cls._pool.add(conn)
+                    return conn
+                
+                # Wait until a connection is returned instead of polling
+                await cls._released.wait()
+
+    @classmethod
+    async def _release(cls, conn: aiosqlite.Connection) -> None:
+        conn.in_use = False
+        if cls._released is None:
+            # Пул уже закрыт (close_all): соединение больше никому не нужно
+            cls._pool.discard(conn)
+            await conn.close()
+            return
+        async with cls._released:
+            cls._released.notify()
 
 class Repository:
     """Repository pattern implementation for database operations"""
     
+    # Отложенная запись: channel_id -> message_id
+    _pending_last_messages: Dict[str, int] = {}
+    _pending_forward_logs: List[Tuple[int, str]] = []  # (message_id, UTC timestamp)
+    _pending_writer: Optional[asyncio.Task] = None
+    # Результат записи очередного пакета для тех, кто его ждет (save_last_message)
+    _pending_batch: Optional[asyncio.Future] = None
+    _writer_waiting = False  # writer has not taken its snapshot of the queue yet
+    PENDING_FLUSH_DELAY = 0.05  # seconds
+    FLUSH_RETRY_DELAY = 5.0  # seconds before retrying a failed batch
+    
+    # Результат get_stats для повторных нажатий: (monotonic time, stats)
+    _stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+    STATS_CACHE_TTL = 2.0  # seconds
+    # Write-through кэш редко меняющихся данных: чтения не ходят в базу
+    _target_chats_cache: Optional[Dict[int, Optional[str]]] = None  # chat_id -> title
+    _config_cache: Dict[str, str] = {}
+    
     @staticmethod
     async def close_db() -> None:
         """Close all database connections"""
         await DatabaseConnectionPool.close_all()
+        Repository._target_chats_cache = None
+        Repository._config_cache.clear()
     
     @staticmethod
     async def init_db() -> None:
@@ -78,6 +120,7 @@ class Repository:
                 );
                 CREATE TABLE IF NOT EXISTS target_chats (
                     chat_id INTEGER PRIMARY KEY,
+                    title TEXT,
                     added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
                 CREATE TABLE IF NOT EXISTS forward_stats (
@@ -100,17 +143,28 @@ class Repository:
                 CREATE INDEX IF NOT EXISTS idx_forward_stats_timestamp ON forward_stats(timestamp);
                 CREATE INDEX IF NOT EXISTS idx_target_chats_added_at ON target_chats(added_at);
             """)
+            # Базы, созданные до появления колонки title
+            async with db.execute("PRAGMA table_info(target_chats)") as cursor:
+                columns = {row[1] for row in await cursor.fetchall()}
+            if "title" not in columns:
+                await db.execute("ALTER TABLE target_chats ADD COLUMN title TEXT")
             await db.commit()
+        # Целевые чаты читаются при каждой пересылке: загружаем их одним запросом при старте
+        Repository._target_chats_cache = None
+        await Repository._load_target_chats()
 
     # Add to Repository class
     @staticmethod
     async def set_channel_interval(channel1: str, channel2: str, interval_seconds: int) -> None:
         """Set interval between two channels"""
-        # You can store this in a dedicated table or as a config entry
-        # Example using config table with a compound key
+        # The interval is mirrored into the config table with a compound key;
+        # both writes share one pooled connection and a single commit
         key = f"channel_interval_{channel1}_{channel2}"
-        await Repository.set_config(key, str(interval_seconds))
         async with DatabaseConnectionPool.get_connection() as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)",
+                (key, str(interval_seconds))
+            )
             await db.execute(
                 """
                 INSERT OR REPLACE INTO channel_intervals 
@@ -120,6 +174,7 @@ class Repository:
                 (channel1, channel2, interval_seconds)
             )
             await db.commit()
+        Repository._config_cache[key] = str(interval_seconds)
 
     @staticmethod
     async def get_channel_intervals() -> Dict[str, Dict[str, Any]]:
@@ -144,19 +199,49 @@ class Repository:
     @staticmethod
     async def get_target_chats() -> List[int]:
         """Get list of target chat IDs"""
-        async with DatabaseConnectionPool.get_connection() as db:
-            async with db.execute("SELECT chat_id FROM target_chats") as cursor:
-                return [row[0] for row in await cursor.fetchall()]
+        return list(await Repository._load_target_chats())
 
     @staticmethod
-    async def add_target_chat(chat_id: int) -> None:
-        """Add new target chat"""
+    async def get_target_chat_titles() -> Dict[int, Optional[str]]:
+        """Get target chat IDs with their stored titles"""
+        return dict(await Repository._load_target_chats())
+
+    @staticmethod
+    async def _load_target_chats() -> Dict[int, Optional[str]]:
+        if Repository._target_chats_cache is None:
+            async with DatabaseConnectionPool.get_connection() as db:
+                rows = await db.execute_fetchall("SELECT chat_id, title FROM target_chats")
+            Repository._target_chats_cache = {row[0]: row[1] for row in rows}
+        return Repository._target_chats_cache
+
+    @staticmethod
+    async def add_target_chat(chat_id: int, title: Optional[str] = None) -> None:
+        """Add new target chat or update its title"""
         async with DatabaseConnectionPool.get_connection() as db:
             await db.execute(
-                "INSERT OR IGNORE INTO target_chats (chat_id) VALUES (?)",
-                (chat_id,)
+                """
+                INSERT INTO target_chats (chat_id, title) VALUES (?, ?)
+                ON CONFLICT(chat_id) DO UPDATE SET title = COALESCE(excluded.title, title)
+                """,
+                (chat_id, title)
             )
             await db.commit()
+        cache = Repository._target_chats_cache
+        if cache is not None:
+            cache[chat_id] = title or cache.get(chat_id)
+
+    @staticmethod
+    async def set_target_chat_titles(titles: Dict[int, str]) -> None:
+        """Store titles of existing target chats"""
+        async with DatabaseConnectionPool.get_connection() as db:
+            await db.executemany(
+                "UPDATE target_chats SET title = ? WHERE chat_id = ?",
+                [(title, chat_id) for chat_id, title in titles.items()]
+            )
+            await db.commit()
+        cache = Repository._target_chats_cache
+        if cache is not None:
+            cache.update((chat_id, title) for chat_id, title in titles.items() if chat_id in cache)
 
     @staticmethod
     async def remove_target_chat(chat_id: int) -> None:
@@ -167,17 +252,24 @@ class Repository:
                 (chat_id,)
             )
             await db.commit()
+        if Repository._target_chats_cache is not None:
+            Repository._target_chats_cache.pop(chat_id, None)
 
     @staticmethod
     async def get_config(key: str, default: Optional[str] = None) -> Optional[str]:
         """Get configuration value"""
+        if key in Repository._config_cache:
+            return Repository._config_cache[key]
         async with DatabaseConnectionPool.get_connection() as db:
             async with db.execute(
                 "SELECT value FROM config WHERE key = ?",
                 (key,)
             ) as cursor:
                 row = await cursor.fetchone()
-                return row[0] if row else default
+        if not row:
+            return default
+        Repository._config_cache[key] = row[0]
+        return row[0]
 
     @staticmethod
     async def set_config(key: str, value: str) -> None:
@@ -188,30 +280,104 @@ class Repository:
                 (key, str(value))
             )
             await db.commit()
+        Repository._config_cache[key] = str(value)
 
     @staticmethod
     async def log_forward(message_id: int) -> None:
-        """Log forwarded message"""
-        async with DatabaseConnectionPool.get_connection() as db:
-            await db.execute(
-                "INSERT INTO forward_stats (message_id) VALUES (?)",
-                (message_id,)
-            )
-            await db.commit()
+        """Log forwarded message, written in a batch shortly after"""
+        # Время фиксируем сейчас в формате CURRENT_TIMESTAMP, а не в момент записи пакета
+        Repository._pending_forward_logs.append(
+            (message_id, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()))
+        )
+        Repository._schedule_flush()
 
     @staticmethod
     async def save_last_message(channel_id: str, message_id: int) -> None:
-        """Save last message ID for channel"""
-        async with DatabaseConnectionPool.get_connection() as db:
-            await db.execute(
-                """
-                INSERT OR REPLACE INTO last_messages 
-                (channel_id, message_id, timestamp) 
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                """,
-                (channel_id, message_id)
-            )
-            await db.commit()
+        """Save last message ID for channel, returns once its batch is written (raises if it fails)"""
+        Repository.queue_last_message(channel_id, message_id)
+        batch = Repository._pending_batch
+        if batch is None:
+            batch = Repository._pending_batch = asyncio.get_running_loop().create_future()
+            batch.add_done_callback(Repository._consume_writer_error)
+        # The future is resolved by the flush that takes this row, whichever caller runs it;
+        # shield: a cancelled caller must not cancel the result for other callers
+        await asyncio.shield(batch)
+
+    @staticmethod
+    def queue_last_message(channel_id: str, message_id: int) -> None:
+        """Queue last message ID for channel, written in a batch shortly after"""
+        Repository._pending_last_messages[channel_id] = message_id
+        Repository._schedule_flush()
+
+    @staticmethod
+    def _schedule_flush(delay: Optional[float] = None) -> None:
+        # Values queued while a batch is being written go to the next batch
+        if not Repository._writer_waiting:
+            Repository._writer_waiting = True
+            writer = asyncio.create_task(Repository._flush_later(
+                Repository.PENDING_FLUSH_DELAY if delay is None else delay
+            ))
+            # Ошибку получают только те, кто ждет запись (save_last_message), остальным она уже в логе
+            writer.add_done_callback(Repository._consume_writer_error)
+            Repository._pending_writer = writer
+
+    @staticmethod
+    def _consume_writer_error(writer: asyncio.Future) -> None:
+        if not writer.cancelled():
+            writer.exception()
+
+    @staticmethod
+    async def _flush_later(delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            Repository._writer_waiting = False
+        await Repository.flush_pending_writes()
+
+    @staticmethod
+    async def flush_pending_writes() -> None:
+        """Write all queued last message IDs and forward logs in one transaction.
+
+        On failure the data is queued again, a retry is scheduled and the error is re-raised.
+        """
+        if not (Repository._pending_last_messages or Repository._pending_forward_logs):
+            return
+        last_messages = list(Repository._pending_last_messages.items())
+        forward_logs = Repository._pending_forward_logs
+        batch = Repository._pending_batch
+        Repository._pending_last_messages.clear()
+        Repository._pending_forward_logs = []
+        Repository._pending_batch = None
+        try:
+            async with DatabaseConnectionPool.get_connection() as db:
+                if last_messages:
+                    await db.executemany(
+                        """
+                        INSERT OR REPLACE INTO last_messages 
+                        (channel_id, message_id, timestamp) 
+                        VALUES (?, ?, CURRENT_TIMESTAMP)
+                        """,
+                        last_messages
+                    )
+                if forward_logs:
+                    await db.executemany(
+                        "INSERT INTO forward_stats (message_id, timestamp) VALUES (?, ?)",
+                        forward_logs
+                    )
+                await db.commit()
+            Repository._stats_cache = None
+        except Exception as e:
+            logger.error(f"Error writing pending data: {e}")
+            # Возвращаем в очередь, если за это время не пришло более новых значений
+            for channel_id, message_id in last_messages:
+                Repository._pending_last_messages.setdefault(channel_id, message_id)
+            Repository._pending_forward_logs[:0] = forward_logs
+            Repository._schedule_flush(Repository.FLUSH_RETRY_DELAY)
+            if batch is not None:
+                batch.set_exception(e)
+            raise
+        if batch is not None:
+            batch.set_result(None)
 
     @staticmethod
     async def get_last_message(channel_id: str) -> Optional[int]:
@@ -248,29 +414,33 @@ class Repository:
 
     @staticmethod
     async def get_stats() -> Dict[str, Any]:
-        """Get forwarding statistics"""
+        """Get forwarding statistics (cached for a short time)"""
+        cached = Repository._stats_cache
+        if cached and time.monotonic() - cached[0] < Repository.STATS_CACHE_TTL:
+            return cached[1]
+        
         async with DatabaseConnectionPool.get_connection() as db:
-            # Get total forwards
-            async with db.execute("SELECT COUNT(*) FROM forward_stats") as cursor:
-                total = (await cursor.fetchone())[0]
-
-            # Get last forward timestamp
-            async with db.execute(
-                "SELECT timestamp FROM forward_stats ORDER BY timestamp DESC LIMIT 1"
-            ) as cursor:
-                last = (await cursor.fetchone() or [None])[0]
-
-            # Get last messages for each channel
-            async with db.execute(
-                "SELECT channel_id, message_id, timestamp FROM last_messages"
-            ) as cursor:
-                last_msgs = {
-                    row[0]: {"message_id": row[1], "timestamp": row[2]}
-                    for row in await cursor.fetchall()
-                }
+            # Totals in one query; both queries are queued to the connection thread together
+            totals, last_rows = await asyncio.gather(
+                db.execute_fetchall(
+                    """
+                    SELECT
+                        (SELECT COUNT(*) FROM forward_stats),
+                        (SELECT MAX(timestamp) FROM forward_stats)
+                    """
+                ),
+                db.execute_fetchall("SELECT channel_id, message_id, timestamp FROM last_messages")
+            )
+            total, last = totals[0]
+            last_msgs = {
+                row[0]: {"message_id": row[1], "timestamp": row[2]}
+                for row in last_rows
+            }
 
-            return {
+            stats = {
                 "total_forwards": total,
                 "last_forward": last,
                 "last_messages": last_msgs
             }
+            Repository._stats_cache = (time.monotonic(), stats)
+            return stats
@@ -1,7 +1,10 @@
-from datetime import datetime
-from typing import Optional, Dict, List, Protocol
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Protocol, Tuple, Union
 from dataclasses import dataclass
 from aiogram import Bot
+from aiogram.types import Chat
 from utils.config import Config
 
 @dataclass
@@ -23,7 +26,9 @@ class ChatCacheService:
     """Chat cache service with observer pattern"""
     _instance = None
     _cache: Dict[int, ChatInfo] = {}
+    _chat_cache: "OrderedDict[str, Tuple[Chat, float]]" = OrderedDict()
     _observers: List[CacheObserver] = []
+    _inflight: Dict[Tuple[str, str], asyncio.Task] = {}
     
     def __new__(cls):
         if cls._instance is None:
@@ -56,20 +61,34 @@ class ChatCacheService:
                 from loguru import logger
                 logger.error(f"Error notifying observer: {e}")
     
+    async def _single_flight(self, key: Tuple[str, str], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one API request between concurrent cache misses for the same key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: a cancelled caller must not cancel the request of other callers
+        return await asyncio.shield(task)
+
     async def get_chat_info(self, bot: Bot, chat_id: int) -> Optional[ChatInfo]:
         """Get chat info from cache or fetch from API"""
-        now = datetime.now().timestamp()
-        
         # Check cache first
         if chat_id in self._cache:
             chat_info = self._cache[chat_id]
-            if now - chat_info.last_updated < self._config.cache_ttl:
+            if time.monotonic() - chat_info.last_updated < self._config.cache_ttl:
                 return chat_info
 
+        return await self._single_flight(("info", str(chat_id)), lambda: self._fetch_chat_info(bot, chat_id))
+
+    async def _fetch_chat_info(self, bot: Bot, chat_id: int) -> Optional[ChatInfo]:
+        now = time.monotonic()
         try:
-            # Fetch fresh data
-            chat = await bot.get_chat(chat_id)
-            member_count = await bot.get_chat_member_count(chat_id)
+            # Fetch fresh data, both requests at once
+            chat, member_count = await asyncio.gather(
+                bot.get_chat(chat_id),
+                bot.get_chat_member_count(chat_id)
+            )
             
             info = ChatInfo(
                 id=chat_id,
@@ -96,10 +115,39 @@ class ChatCacheService:
             logger.error(f"Error fetching chat info for {chat_id}: {e}")
             return None
     
+    async def get_chat_cached(self, bot: Bot, chat_id: Union[int, str]) -> Chat:
+        """Get chat object from cache or fetch from API (errors are propagated)"""
+        key = str(chat_id)
+        now = time.monotonic()
+        
+        cached = self._chat_cache.get(key)
+        if cached and now - cached[1] < self._config.cache_ttl:
+            self._chat_cache.move_to_end(key)
+            return cached[0]
+        
+        return await self._single_flight(("chat", key), lambda: self._fetch_chat(bot, chat_id))
+
+    async def _fetch_chat(self, bot: Bot, chat_id: Union[int, str]) -> Chat:
+        key = str(chat_id)
+        chat = await bot.get_chat(chat_id)
+        now = time.monotonic()
+        # Store under the numeric ID too, so a lookup by username also serves later lookups by ID
+        for cache_key in {key, str(chat.id)}:
+            self._chat_cache[cache_key] = (chat, now)
+            self._chat_cache.move_to_end(cache_key)
+        
+        # Drop least recently used entries if cache is too large
+        while len(self._chat_cache) > self._config.max_cache_size:
+            self._chat_cache.popitem(last=False)
+        
+        return chat
+    
     def clear_cache(self) -> None:
         """Clear the entire cache"""
         self._cache.clear()
+        self._chat_cache.clear()
     
     def remove_from_cache(self, chat_id: int) -> None:
         """Remove specific chat from cache"""
         self._cache.pop(chat_id, None)
+        self._chat_cache.pop(str(chat_id), None)
@@ -0,0 +1,29 @@
+import pytest
+
+from database.repository import Repository
+from utils.config import Config
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Fresh Config singleton working in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BOT_TOKEN", "42:TEST")
+    monkeypatch.setenv("ADMIN_IDS", "1")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.delenv("SOURCE_CHANNEL", raising=False)
+    Config._instance = None
+    yield Config()
+    Config._instance = None
+
+@pytest.fixture
+def repository(config):
+    """Repository with empty write queues and caches"""
+    Repository._pending_last_messages = {}
+    Repository._pending_forward_logs = []
+    Repository._pending_writer = None
+    Repository._pending_batch = None
+    Repository._writer_waiting = False
+    Repository._stats_cache = None
+    Repository._target_chats_cache = None
+    Repository._config_cache.clear()
+    yield Repository
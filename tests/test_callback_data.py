@@ -0,0 +1,18 @@
+import pytest
+
+from utils.callback_data import IntervalCallback, parse_interval_callback
+
+@pytest.mark.parametrize("data, expected", [
+    ("interval_menu", IntervalCallback("menu")),
+    ("interval_3600", IntervalCallback("global", seconds=3600)),
+    ("interval_between_-1001_-1002", IntervalCallback("between", "-1001", "-1002")),
+    ("interval_between_news_other_chan", IntervalCallback("between", "news", "other_chan")),
+    ("set_interval_-1001_-1002_900", IntervalCallback("set", "-1001", "-1002", 900)),
+    ("set_interval_news_-1002_60", IntervalCallback("set", "news", "-1002", 60)),
+])
+def test_parse_interval_callback(data, expected):
+    assert parse_interval_callback(data) == expected
+
+@pytest.mark.parametrize("data", ["interval_", "interval_abc", "set_interval_-1001_-1002_x", "stats"])
+def test_parse_interval_callback_rejects_other_data(data):
+    assert parse_interval_callback(data) is None
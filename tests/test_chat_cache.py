@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.chat_cache import ChatCacheService
+
+class FakeBot:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_chat(self, chat_id):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(id=-1001, title="News", type="channel")
+
+@pytest.fixture
+def cache(config):
+    ChatCacheService._instance = None
+    ChatCacheService._chat_cache.clear()
+    ChatCacheService._inflight.clear()
+    yield ChatCacheService()
+    ChatCacheService._instance = None
+
+def test_concurrent_misses_share_one_request(cache):
+    async def scenario():
+        bot = FakeBot()
+        chats = await asyncio.gather(*(cache.get_chat_cached(bot, "news") for _ in range(5)))
+        assert bot.calls == 1
+        assert {chat.title for chat in chats} == {"News"}
+
+    asyncio.run(scenario())
+
+def test_lookup_by_username_serves_lookup_by_id(cache):
+    async def scenario():
+        bot = FakeBot()
+        await cache.get_chat_cached(bot, "news")
+        await cache.get_chat_cached(bot, -1001)
+        assert bot.calls == 1
+
+    asyncio.run(scenario())
+
+def test_expired_entry_is_fetched_again(cache, config):
+    config.cache_ttl = 0
+
+    async def scenario():
+        bot = FakeBot()
+        await cache.get_chat_cached(bot, "news")
+        await cache.get_chat_cached(bot, "news")
+        assert bot.calls == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+def test_is_source_channel_by_id_and_username(config):
+    config.source_channels = ["-1001", "NewsChannel"]
+    assert config.is_source_channel("-1001")
+    assert config.is_source_channel("-1002", "newschannel")
+    assert config.is_source_channel("-1002", "NEWSCHANNEL")
+    assert not config.is_source_channel("-1002")
+    assert not config.is_source_channel("-1002", "other")
+
+def test_is_source_channel_follows_add_and_remove(config):
+    async def scenario():
+        assert config.add_source_channel("@fresh")
+        assert not config.add_source_channel("fresh")
+        assert config.is_source_channel("-1", "Fresh")
+        assert config.remove_source_channel("fresh")
+        assert not config.is_source_channel("-1", "fresh")
+        config.save_pending_channels()
+
+    asyncio.run(scenario())
+
+def test_channel_saves_are_debounced(config, tmp_path):
+    async def scenario():
+        config.add_source_channel("-1001")
+        config.add_source_channel("-1002")
+        # Nothing written until the debounce delay passes
+        assert json.loads((tmp_path / "bot_config.json").read_text())["source_channels"] == []
+        await asyncio.sleep(0.3)
+        assert json.loads((tmp_path / "bot_config.json").read_text())["source_channels"] == ["-1001", "-1002"]
+
+    asyncio.run(scenario())
+
+def test_save_pending_channels_writes_immediately(config, tmp_path):
+    async def scenario():
+        config.add_source_channel("-1001")
+        config.save_pending_channels()
+        assert json.loads((tmp_path / "bot_config.json").read_text())["source_channels"] == ["-1001"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,31 @@
+from aiogram import Bot
+from aiogram.types import Message
+
+from utils.keyboard_factory import KeyboardFactory
+
+def _parsed_message(markup) -> Message:
+    """Build a message the way aiogram parses it from an update (with the bot context)"""
+    bot = Bot(token="42:TEST")
+    data = {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "text": "menu",
+        "reply_markup": markup.model_dump(exclude_none=True) if markup else None,
+    }
+    return Message.model_validate(data, context={"bot": bot})
+
+def test_same_markup_ignores_bot_context():
+    markup = KeyboardFactory.create_main_keyboard(True, False)
+    message = _parsed_message(markup)
+    assert KeyboardFactory.same_markup(message.reply_markup, markup)
+
+def test_same_markup_detects_changed_keyboard():
+    message = _parsed_message(KeyboardFactory.create_main_keyboard(True, False))
+    assert not KeyboardFactory.same_markup(message.reply_markup, KeyboardFactory.create_main_keyboard(True, True))
+
+def test_same_markup_handles_none():
+    markup = KeyboardFactory.create_main_keyboard()
+    assert KeyboardFactory.same_markup(None, None)
+    assert not KeyboardFactory.same_markup(None, markup)
+    assert not KeyboardFactory.same_markup(_parsed_message(markup).reply_markup, None)
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("orjson")
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, GetUpdates, SendMessage
+
+from utils.rate_limited_bot import RateLimitMiddleware
+
+async def _respond(bot, method):
+    await asyncio.sleep(0.01)
+    return method.__api_method__
+
+@pytest.mark.parametrize("chat_id, private", [
+    (12345, True), ("12345", True), (-1001, False), ("-1001", False), ("@channel", False),
+])
+def test_private_chat_detection(chat_id, private):
+    assert RateLimitMiddleware._is_private_chat(chat_id) is private
+
+def test_busy_chats_do_not_hold_concurrency_slots():
+    async def scenario():
+        limiter = RateLimitMiddleware(global_rate=1000, chat_rate=1, initial_concurrency=2)
+        busy = [
+            asyncio.create_task(limiter(_respond, None, SendMessage(chat_id=-100 - i, text="x")))
+            for i in range(4) for _ in range(2)
+        ]
+        await asyncio.sleep(0.1)
+        answer = AnswerCallbackQuery(callback_query_id="1")
+        assert await asyncio.wait_for(limiter(_respond, None, answer), timeout=1) == "answerCallbackQuery"
+        for task in busy:
+            task.cancel()
+
+    asyncio.run(scenario())
+
+def test_get_updates_takes_no_slot():
+    async def scenario():
+        limiter = RateLimitMiddleware(initial_concurrency=1)
+        seen = []
+
+        async def respond(bot, method):
+            seen.append(limiter._in_flight)
+            return None
+
+        await limiter(respond, None, GetUpdates())
+        await limiter(respond, None, AnswerCallbackQuery(callback_query_id="1"))
+        assert seen == [0, 1]
+
+    asyncio.run(scenario())
+
+def test_flood_control_halves_concurrency_and_retries():
+    async def scenario():
+        limiter = RateLimitMiddleware(initial_concurrency=8)
+        calls = []
+
+        async def respond(bot, method):
+            calls.append(method)
+            if len(calls) == 1:
+                raise TelegramRetryAfter(method, "Flood control exceeded", 0)
+            return "ok"
+
+        assert await limiter(respond, None, SendMessage(chat_id=1, text="x")) == "ok"
+        assert len(calls) == 2
+        assert limiter._concurrency == 4.5  # halved, then one additive step after the fast success
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from database.repository import DatabaseConnectionPool
+
+@pytest.fixture
+def broken_db(monkeypatch):
+    """Make every new database connection fail until the returned switch is turned off"""
+    working = DatabaseConnectionPool.get_connection
+    state = {"broken": True}
+
+    @asynccontextmanager
+    async def get_connection():
+        if state["broken"]:
+            raise RuntimeError("disk I/O error")
+        async with working() as db:
+            yield db
+
+    monkeypatch.setattr(DatabaseConnectionPool, "get_connection", get_connection)
+    return state
+
+def test_save_last_message_is_written(repository):
+    async def scenario():
+        await repository.init_db()
+        await repository.save_last_message("-1001", 42)
+        assert await repository.get_last_message("-1001") == 42
+        await repository.close_db()
+
+    asyncio.run(scenario())
+
+def test_queued_writes_are_batched(repository):
+    async def scenario():
+        await repository.init_db()
+        repository.queue_last_message("-1001", 1)
+        repository.queue_last_message("-1001", 2)
+        await repository.log_forward(2)
+        await repository.flush_pending_writes()
+        assert await repository.get_last_message("-1001") == 2
+        assert (await repository.get_stats())["total_forwards"] == 1
+        await repository.close_db()
+
+    asyncio.run(scenario())
+
+def test_failed_write_is_raised_and_retried(repository, broken_db, monkeypatch):
+    monkeypatch.setattr(repository, "FLUSH_RETRY_DELAY", 0.1)
+
+    async def scenario():
+        broken_db["broken"] = False
+        await repository.init_db()
+        broken_db["broken"] = True
+        with pytest.raises(RuntimeError):
+            await repository.save_last_message("-1001", 42)
+        broken_db["broken"] = False
+        await asyncio.sleep(0.3)
+        assert await repository.get_last_message("-1001") == 42
+        await repository.close_db()
+
+    asyncio.run(scenario())
+
+def test_waiter_sees_failure_of_a_direct_flush(repository, broken_db):
+    async def scenario():
+        broken_db["broken"] = False
+        await repository.init_db()
+        waiter = asyncio.create_task(repository.save_last_message("-1001", 42))
+        await asyncio.sleep(0)
+        broken_db["broken"] = True
+        # A direct flush (as on shutdown) takes the queued row and fails
+        with pytest.raises(RuntimeError):
+            await repository.flush_pending_writes()
+        broken_db["broken"] = False
+        with pytest.raises(RuntimeError):
+            await waiter
+        await repository.flush_pending_writes()
+        assert await repository.get_last_message("-1001") == 42
+        await repository.close_db()
+
+    asyncio.run(scenario())
+
+def test_connection_released_after_pool_closed(repository):
+    async def scenario():
+        await repository.init_db()
+        async with DatabaseConnectionPool.get_connection():
+            await repository.close_db()
+        assert not DatabaseConnectionPool._pool
+
+    asyncio.run(scenario())
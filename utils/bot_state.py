@@ -1,10 +1,27 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Coroutine, List, Optional, Set
 import asyncio
+import re
 from loguru import logger
 from database.repository import Repository
 from datetime import datetime
-from aiogram import types
+
+# Forward/copy errors meaning the source message is gone or can't be sent
+_UNAVAILABLE_MSG_RE = re.compile(
+    r"message to (?:forward|copy) not found|message can't be (?:forwarded|copied)", re.IGNORECASE
+)
+# Errors meaning the message ID does not exist (plain, forward and copy wording)
+_MISSING_MSG_RE = re.compile(r"message (?:to (?:forward|copy) )?not found", re.IGNORECASE)
+_BOT_BLOCKED_RE = re.compile(r"bot was blocked by the user", re.IGNORECASE)
+_CHAT_NOT_FOUND_RE = re.compile(r"chat not found", re.IGNORECASE)
+
+def _is_unavailable_message_error(error_text: str) -> bool:
+    """Check if a forward/copy error means the source message is gone or can't be sent"""
+    return _UNAVAILABLE_MSG_RE.search(error_text) is not None
+
+def is_missing_message_error(error_text: str) -> bool:
+    """Check if an API error means the message ID does not exist"""
+    return _MISSING_MSG_RE.search(error_text) is not None
 
 class BotState(ABC):
     """Abstract base class for bot states"""
@@ -34,7 +51,7 @@ class IdleState(BotState):
     async def start(self) -> None:
         interval = int(await Repository.get_config("repost_interval", "3600"))
         self.context.state = RunningState(self.context, interval, self.auto_forward)
-        await self.context._notify_admins("Бот начал пересылку")
+        self.context._run_in_background(self.context._notify_admins("Бот начал пересылку"))
     
     async def stop(self) -> None:
         # Already stopped
@@ -52,6 +69,7 @@ class RunningState(BotState):
         self.context = bot_context
         self.interval = interval  # Global repost interval
         self._repost_task: Optional[asyncio.Task] = None
+        self._repost_wake = asyncio.Event()  # Прерывает ожидание тика при смене интервала
         self.auto_forward = auto_forward
         
         # Initialize tracking for each channel's last post time
@@ -77,6 +95,10 @@ class RunningState(BotState):
         if not self._repost_task or self._repost_task.done():
             self._repost_task = asyncio.create_task(self._fallback_repost())
 
+    def wake_repost(self) -> None:
+        """Re-evaluate the repost schedule now instead of at the next tick"""
+        self._repost_wake.set()
+
     async def toggle_auto_forward(self):
         """Toggle automatic message forwarding"""
         self.auto_forward = not self.auto_forward
@@ -91,7 +113,7 @@ class RunningState(BotState):
             self._repost_task.cancel()
         self.auto_forward = False
         self.context.state = IdleState(self.context, self.auto_forward)
-        await self.context._notify_admins("Бот остановил пересылку")
+        self.context._run_in_background(self.context._notify_admins("Бот остановил пересылку"))
     
     # Также модифицируем метод handle_message в классе RunningState в файле utils/bot_state.py
 
@@ -143,12 +165,10 @@ class RunningState(BotState):
                 try:
                     return await self.context._forward_message(channel_id, msg_id)
                 except Exception as e:
-                    error_text = str(e).lower()
-                    if "message to forward not found" in error_text or "message can't be forwarded" in error_text:
+                    if _is_unavailable_message_error(str(e)):
                         # Добавляем в кэш недоступных сообщений
                         self.context._temp_unavailable_messages[f"{channel_id}:{msg_id}"] = current_time
-                    
-                    if "message to forward not found" not in error_text and "message can't be forwarded" not in error_text:
+                    else:
                         logger.error(f"Ошибка при пересылке сообщения {msg_id} из канала {channel_id}: {e}")
                     
                     return False
@@ -232,49 +252,46 @@ class RunningState(BotState):
     # 2. Метод для пересылки конкретного сообщения во все целевые чаты
     async def _forward_specific_message(self, channel_id: str, message_id: int) -> bool:
         """Пересылает конкретное сообщение во все целевые чаты"""
-        success = False
         target_chats = await Repository.get_target_chats()
         
-        # Используем bot из контекста
-        bot = self.context.bot
-        
         if not target_chats:
             logger.warning("Нет целевых чатов для пересылки")
             return False
             
-        for chat_id in target_chats:
-            if str(chat_id) == channel_id:
-                logger.info(f"Пропускаю пересылку в исходный канал {chat_id}")
-                continue
-                
+        async def forward_to(chat_id: int) -> bool:
             try:
-                await bot.forward_message(
-                    chat_id=chat_id,
-                    from_chat_id=channel_id,
-                    message_id=message_id
-                )
+                await self.context._send_to_chat(chat_id, channel_id, message_id)
                 await Repository.log_forward(message_id)
-                success = True
                 logger.debug(f"Сообщение {message_id} успешно переслано в {chat_id}")
+                return True
             except Exception as e:
-                error_text = str(e).lower()
-                if "message to forward not found" in error_text or "message can't be forwarded" in error_text:
+                error_text = str(e)
+                if _is_unavailable_message_error(error_text):
                     logger.debug(f"Сообщение {message_id} недоступно для пересылки в {chat_id}")
-                elif "bot was blocked by the user" in error_text:
+                elif _BOT_BLOCKED_RE.search(error_text):
                     logger.warning(f"Бот заблокирован в чате {chat_id}")
-                elif "chat not found" in error_text:
+                elif _CHAT_NOT_FOUND_RE.search(error_text):
                     logger.warning(f"Чат {chat_id} не найден")
                 else:
                     logger.error(f"Ошибка при пересылке в {chat_id}: {e}")
+                return False
         
-        return success
+        # Пересылаем во все чаты параллельно; темп запросов ограничивает RateLimitMiddleware
+        results = await asyncio.gather(*(
+            forward_to(chat_id) for chat_id in self.context._forward_targets(target_chats, channel_id)
+        ))
+        return any(results)
 
     # 3. Теперь обновляем метод _fallback_repost для использования новой логики
     async def _fallback_repost(self):
         """Periodic repost task with parallel message checking but sequential sending"""
         while True:
             try:
-                await asyncio.sleep(10)
+                try:
+                    await asyncio.wait_for(self._repost_wake.wait(), timeout=10)
+                except asyncio.TimeoutError:
+                    pass
+                self._repost_wake.clear()
                 
                 now = datetime.now().timestamp()
                 source_channels = self.context.config.source_channels
@@ -354,20 +371,10 @@ class RunningState(BotState):
                 message_id = await Repository.get_last_message(next_channel)
                 
                 if not message_id:
+                    # Bot API не читает историю канала: ждем следующий channel_post
                     logger.warning(f"Не найдено сообщение для канала {next_channel}")
-                    
-                    try:
-                        latest_id = await self.context.find_latest_message(next_channel)
-                        if latest_id:
-                            message_id = latest_id
-                            await Repository.save_last_message(next_channel, latest_id)
-                        else:
-                            self._channel_last_post[next_channel] = now
-                            continue
-                    except Exception as e:
-                        logger.error(f"Ошибка при поиске последнего сообщения: {e}")
-                        self._channel_last_post[next_channel] = now
-                        continue
+                    self._channel_last_post[next_channel] = now
+                    continue
                 
                 pending_messages = self._pending_messages.get(next_channel, [])
                 if pending_messages:
@@ -520,12 +527,10 @@ class RunningState(BotState):
             success = await self.context._forward_message(channel_id, msg_id)
             return (success, msg_id)
         except Exception as e:
-            error_text = str(e).lower()
-            if "message to forward not found" in error_text or "message can't be forwarded" in error_text:
+            if _is_unavailable_message_error(str(e)):
                 # Добавляем в кэш недоступных сообщений
                 self.context._temp_unavailable_messages[f"{channel_id}:{msg_id}"] = current_time
-            
-            if "message to forward not found" not in error_text and "message can't be forwarded" not in error_text:
+            else:
                 logger.error(f"Ошибка при пересылке сообщения {msg_id} из канала {channel_id}: {e}")
             
             return (False, msg_id)
@@ -580,8 +585,7 @@ class RunningState(BotState):
             return (success, message_id)
         except Exception as e:
             # Если сообщение недоступно, добавляем его в кэш
-            error_text = str(e).lower()
-            if "message to forward not found" in error_text or "message can't be forwarded" in error_text:
+            if _is_unavailable_message_error(str(e)):
                 msg_key = f"{channel_id}:{message_id}"
                 self.context._temp_unavailable_messages[msg_key] = timestamp
             raise e
@@ -592,7 +596,23 @@ class BotContext:
     def __init__(self, bot, config):
         self.bot = bot
         self.config = config
+        self._background_tasks: Set[asyncio.Task] = set()
         self.state: BotState = IdleState(self)
+
+    @property
+    def state(self) -> BotState:
+        return self._state
+
+    @state.setter
+    def state(self, value: BotState) -> None:
+        # Флаг обновляется только при смене состояния, а не при каждой проверке
+        self._state = value
+        self._running = isinstance(value, RunningState)
+
+    @property
+    def is_running(self) -> bool:
+        """Check if forwarding is running"""
+        return self._running
     
     async def start(self) -> None:
         await self.state.start()
@@ -605,7 +625,6 @@ class BotContext:
     
     async def _forward_message(self, channel_id: str, message_id: int) -> bool:
         """Forward a message to all target chats with improved reliability and speed"""
-        success = False
         target_chats = await Repository.get_target_chats()
         
         if not target_chats:
@@ -627,43 +646,60 @@ class BotContext:
             logger.debug(f"Пропуск недавно недоступного сообщения {message_id} из канала {channel_id}")
             return False
 
-        # Пробуем получить сообщение только один раз для всех чатов
-        try:
-            await self.bot.get_messages(channel_id, message_id)
-        except Exception as e:
-            if "message to forward not found" in str(e) or "message not found" in str(e):
-                logger.debug(f"Сообщение {message_id} не найдено в канале {channel_id}")
-                self._temp_unavailable_messages[msg_key] = current_time
-                return False
-        
-        for chat_id in target_chats:
-            if str(chat_id) == channel_id:
-                logger.info(f"Пропускаю пересылку в исходный канал {chat_id}")
-                continue
-                
+        async def forward_to(chat_id: int) -> bool:
             try:
-                await self.bot.forward_message(
-                    chat_id=chat_id,
-                    from_chat_id=channel_id,
-                    message_id=message_id
-                )
+                await self._send_to_chat(chat_id, channel_id, message_id)
                 await Repository.log_forward(message_id)
-                success = True
                 logger.debug(f"Сообщение {message_id} успешно переслано в {chat_id}")
+                return True
             except Exception as e:
-                error_text = str(e).lower()
+                error_text = str(e)
                 # Временно помечаем сообщение как недоступное
-                if "message to forward not found" in error_text or "message can't be forwarded" in error_text:
+                if _is_unavailable_message_error(error_text):
                     logger.debug(f"Сообщение {message_id} недоступно для пересылки в {chat_id}")
                     self._temp_unavailable_messages[msg_key] = current_time
-                elif "bot was blocked by the user" in error_text:
+                elif _BOT_BLOCKED_RE.search(error_text):
                     logger.warning(f"Бот заблокирован в чате {chat_id}")
-                elif "chat not found" in error_text:
+                elif _CHAT_NOT_FOUND_RE.search(error_text):
                     logger.warning(f"Чат {chat_id} не найден")
                 else:
                     logger.error(f"Ошибка при пересылке в {chat_id}: {e}")
+                return False
+
+        # Пересылаем во все чаты параллельно; темп запросов ограничивает RateLimitMiddleware
+        results = await asyncio.gather(*(
+            forward_to(chat_id) for chat_id in self._forward_targets(target_chats, channel_id)
+        ))
+        return any(results)
+
+    async def _send_to_chat(self, chat_id: int, channel_id: str, message_id: int) -> None:
+        """Forward a channel message, or copy it without the "Forwarded from" header if configured"""
+        send = self.bot.copy_message if self.config.copy_messages else self.bot.forward_message
+        await send(chat_id=chat_id, from_chat_id=channel_id, message_id=message_id)
+
+    @staticmethod
+    def _forward_targets(target_chats: List[int], channel_id: str) -> List[int]:
+        """Target chats except the source channel itself"""
+        targets = []
+        for chat_id in target_chats:
+            if str(chat_id) == channel_id:
+                logger.info(f"Пропускаю пересылку в исходный канал {chat_id}")
+                continue
+            targets.append(chat_id)
+        return targets
+    
+    def _run_in_background(self, coro: Coroutine) -> asyncio.Task:
+        """Run a side-effect coroutine without blocking the caller"""
+        task = asyncio.create_task(coro)
+        # Keep a reference so the task is not garbage collected before it finishes
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
 
-        return success
+    async def wait_background_tasks(self):
+        """Wait for pending background tasks, e.g. before shutdown"""
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
     
     async def _notify_owner(self, message: str):
         """Send notification to bot owner (for compatibility)"""
@@ -0,0 +1,43 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from aiogram.filters.callback_data import CallbackData
+
+class RemoveChatCallback(CallbackData, prefix="rmc"):
+    """Remove button of a target chat"""
+    chat_id: int
+
+class RemoveChannelCallback(CallbackData, prefix="rmch"):
+    """Remove button of a source channel"""
+    channel: str
+
+class MoveChannelCallback(CallbackData, prefix="mv"):
+    """Up/down button of a source channel in the reorder menu"""
+    direction: str  # "up" or "down"
+    channel: str
+
+@dataclass(frozen=True)
+class IntervalCallback:
+    """Parsed callback data of the interval menus"""
+    action: str  # "between", "set", "menu" or "global"
+    channel1: Optional[str] = None
+    channel2: Optional[str] = None
+    seconds: Optional[int] = None
+
+# Channel IDs are matched first; a username in the first position must not contain "_"
+_RX_INTERVAL_BETWEEN = re.compile(r"interval_between_(-?\d+|.+?)_(.+)")
+_RX_SET_INTERVAL = re.compile(r"set_interval_(-?\d+|.+?)_(.+)_(\d+)")
+_RX_GLOBAL_INTERVAL = re.compile(r"interval_(\d+)")
+
+def parse_interval_callback(data: str) -> Optional[IntervalCallback]:
+    """Parse interval callback data with precompiled patterns"""
+    if data == "interval_menu":
+        return IntervalCallback("menu")
+    if m := _RX_INTERVAL_BETWEEN.fullmatch(data):
+        return IntervalCallback("between", m[1], m[2])
+    if m := _RX_SET_INTERVAL.fullmatch(data):
+        return IntervalCallback("set", m[1], m[2], int(m[3]))
+    if m := _RX_GLOBAL_INTERVAL.fullmatch(data):
+        return IntervalCallback("global", seconds=int(m[1]))
+    return None
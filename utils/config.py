@@ -40,15 +40,20 @@ class Config:
         # For backwards compatibility - still store the first admin as owner_id
         self.owner_id: int = self.admin_ids[0] if self.admin_ids else 0
         
-        self.source_channels: List[str] = []
+        self.source_channels = []
+        self._channels_save_handle: Optional[asyncio.TimerHandle] = None
         
         # Support for backwards compatibility - add initial source channel if provided
         initial_source = os.getenv("SOURCE_CHANNEL", "").lstrip('@')
         if initial_source:
             self.source_channels.append(initial_source)
+            self._rebuild_source_index()
             
         self.db_path: str = os.getenv("DB_PATH", "forwarder.db")
         
+        # Copy posts instead of forwarding them (no "Forwarded from" header)
+        self.copy_messages: bool = os.getenv("COPY_MESSAGES", "").lower() in ("1", "true", "yes")
+        
         # Try to load additional source channels from config file
         self._load_channels_from_config()
         
@@ -57,18 +62,49 @@ class Config:
             raise ValueError("Missing required environment variables")
         
         # Cache settings
-        self.cache_ttl: int = 300  # 5 minutes cache for chat info
+        try:
+            # Seconds to keep chat info (titles, member counts) cached, 5 minutes by default
+            self.cache_ttl: int = int(os.getenv("CHAT_INFO_TTL", "300"))
+        except ValueError as e:
+            logger.error(f"Error parsing CHAT_INFO_TTL: {e}")
+            self.cache_ttl = 300
         self.max_cache_size: int = 100
         
         # Database connection settings
         self.max_db_connections: int = 5
         
+        # Telegram API rate limits
+        self.api_rate_limit: int = 30  # requests per second for the whole bot
+        self.chat_rate_limit: int = 20  # messages per minute for a single group
+        self.private_chat_rate_limit: int = 1  # messages per second for a single private chat
+        self.api_max_concurrency: int = 30
+        
         self._initialized = True
     
     def is_admin(self, user_id: int) -> bool:
         """Check if user is an admin"""
         return user_id in self.admin_ids
     
+    @property
+    def source_channels(self) -> List[str]:
+        return self._source_channels
+    
+    @source_channels.setter
+    def source_channels(self, channels: List[str]) -> None:
+        self._source_channels = channels
+        self._rebuild_source_index()
+    
+    def _rebuild_source_index(self) -> None:
+        """Rebuild lookup sets used to match incoming channel posts"""
+        self._source_ids = frozenset(self._source_channels)
+        self._source_usernames = frozenset(channel.lower() for channel in self._source_channels)
+    
+    def is_source_channel(self, chat_id: str, username: Optional[str] = None) -> bool:
+        """Check if a chat is one of the source channels by ID or username"""
+        return chat_id in self._source_ids or (
+            username is not None and username.lower() in self._source_usernames
+        )
+    
     def _load_channels_from_config(self):
         """Load channels from configuration file"""
         try:
@@ -80,6 +116,7 @@ class Config:
                         channel = str(channel).lstrip('@')
                         if channel and channel not in self.source_channels:
                             self.source_channels.append(channel)
+                    self._rebuild_source_index()
         except (FileNotFoundError, json.JSONDecodeError):
             # Create default config if not exists
             self._save_channels_to_config()
@@ -104,21 +141,41 @@ class Config:
         except Exception as e:
             logger.error(f"Failed to save channels to config: {e}")
             
-    # Fix in utils/config.py
+    def schedule_channels_save(self, delay: float = 0.2) -> None:
+        """Save channels to configuration file shortly, coalescing repeated edits"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. during startup) - save right away
+            self._save_channels_to_config()
+            return
+        if self._channels_save_handle is None:
+            self._channels_save_handle = loop.call_later(delay, self.save_pending_channels)
+    
+    def save_pending_channels(self) -> None:
+        """Write a scheduled channels save immediately"""
+        if self._channels_save_handle is None:
+            return
+        self._channels_save_handle.cancel()
+        self._channels_save_handle = None
+        self._save_channels_to_config()
+    
     def add_source_channel(self, channel: str) -> bool:
         """Add a new source channel and save to config"""
         channel = channel.lstrip('@')
-        if channel and channel not in self.source_channels:
+        if channel and channel not in self._source_ids:
             self.source_channels.append(channel)
-            self._save_channels_to_config()
+            self._rebuild_source_index()
+            self.schedule_channels_save()
             return True
         return False
         
     def remove_source_channel(self, channel: str) -> bool:
         """Remove a source channel and update config"""
         channel = channel.lstrip('@')
-        if channel in self.source_channels:
+        if channel in self._source_ids:
             self.source_channels.remove(channel)
-            self._save_channels_to_config()
+            self._rebuild_source_index()
+            self.schedule_channels_save()
             return True
-        return False
\ No newline at end of file
+        return False
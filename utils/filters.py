@@ -0,0 +1,14 @@
+from typing import Union
+
+from aiogram import types
+from aiogram.filters import BaseFilter
+from utils.config import Config
+
+class AdminFilter(BaseFilter):
+    """Pass only messages and callbacks from bot admins"""
+
+    def __init__(self):
+        self.admin_ids = frozenset(Config().admin_ids)
+
+    async def __call__(self, event: Union[types.Message, types.CallbackQuery]) -> bool:
+        return event.from_user is not None and event.from_user.id in self.admin_ids
@@ -1,12 +1,23 @@
+import functools
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from aiogram.types import InlineKeyboardMarkup
+from utils.callback_data import RemoveChannelCallback, RemoveChatCallback
 
 class KeyboardFactory:
     """Factory Pattern implementation for creating keyboards"""
     
     @staticmethod
+    def same_markup(current: Optional[InlineKeyboardMarkup], new: Optional[InlineKeyboardMarkup]) -> bool:
+        """Compare keyboards by content (== also compares the private bot reference of parsed markups)"""
+        if current is None or new is None:
+            return current is new
+        return current.model_dump(exclude_none=True) == new.model_dump(exclude_none=True)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
     def create_main_keyboard(running: bool = False, auto_forward: bool = False) -> Any:
-        """Create main menu keyboard"""
+        """Create main menu keyboard (memoized: only 4 state combinations exist)"""
         kb = InlineKeyboardBuilder()
         kb.button(
             text="🔄 Начать пересылку" if not running else "⏹ Остановить пересылку",
@@ -26,8 +37,9 @@ class KeyboardFactory:
         return kb.as_markup()
 
     @staticmethod
-    async def create_interval_keyboard() -> Any:
-        """Create interval selection keyboard"""
+    @functools.lru_cache(maxsize=1)
+    def create_interval_keyboard() -> Any:
+        """Create interval selection keyboard (memoized: it never changes)"""
         kb = InlineKeyboardBuilder()
         intervals = [
             ("5м", 300), ("15м", 900), ("30м", 1800),
@@ -47,7 +59,7 @@ class KeyboardFactory:
         for chat_id, title in chats.items():
             kb.button(
                 text=f"❌ Удалить {title}",
-                callback_data=f"remove_{chat_id}"
+                callback_data=RemoveChatCallback(chat_id=chat_id).pack()
             )
         kb.button(text="Назад", callback_data="back_to_main")
         kb.adjust(1)
@@ -173,16 +185,22 @@ class KeyboardFactory:
     @staticmethod
     def create_channel_management_keyboard(channels: List[str]) -> Any:
         """Create simplified channel management keyboard"""
+        # The buttons depend only on whether there are 0, 1 or 2+ channels
+        return KeyboardFactory._channel_management_keyboard(min(len(channels), 2))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=3)
+    def _channel_management_keyboard(channel_count: int) -> Any:
         kb = InlineKeyboardBuilder()
         
         # Основные действия
         kb.button(text="➕ Добавить канал", callback_data="add_channel")
         
-        if channels:
+        if channel_count:
             kb.button(text="❌ Удалить канал", callback_data="remove_channel_menu")
             kb.button(text="↕️ Изменить порядок", callback_data="reorder_channels")
         
-        if len(channels) >= 2:
+        if channel_count >= 2:
             kb.button(text="⏱️ Интервалы между каналами", callback_data="channel_intervals")
         
         kb.button(text="🔙 Назад", callback_data="back_to_main")
@@ -223,7 +241,7 @@ class KeyboardFactory:
             
             kb.button(
                 text=f"❌ {display_name}",
-                callback_data=f"remove_channel_{channel}"
+                callback_data=RemoveChannelCallback(channel=channel).pack()
             )
         
         # Навигационные кнопки
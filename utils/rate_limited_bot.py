@@ -0,0 +1,166 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Union
+
+import orjson
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from loguru import logger
+from utils.config import Config
+
+# Methods that count against Telegram's per-chat message limits
+_MESSAGE_METHOD_PREFIXES = ("send", "forward", "copy")
+# Long polling holds its request for the whole polling timeout, so it takes no concurrency slot
+_UNSLOTTED_METHODS = frozenset({"getUpdates"})
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Session middleware throttling outgoing Bot API requests.
+
+    Requests pass a global sliding window, a per-chat sliding window for
+    messages (per minute for groups and channels, per second for private
+    chats), and an AIMD concurrency limit
+    that halves on 429 responses and grows additively on fast successes.
+    """
+
+    def __init__(
+        self,
+        global_rate: int = 30,
+        chat_rate: int = 20,
+        private_chat_rate: int = 1,
+        initial_concurrency: float = 8,
+        max_concurrency: float = 30,
+        increase_step: float = 0.5,
+        decrease_factor: float = 0.5,
+        latency_target: float = 1.0,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.private_chat_rate = private_chat_rate
+        self.max_concurrency = max_concurrency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+
+        self._concurrency = initial_concurrency
+        self._in_flight = 0
+        self._slot_released = asyncio.Condition()
+        self._global_window: Deque[float] = deque()
+        self._chat_windows: Dict[Union[int, str], Deque[float]] = defaultdict(deque)
+        self._last_prune = time.monotonic()
+
+    @staticmethod
+    async def _wait_window(window: Deque[float], limit: int, period: float) -> None:
+        """Wait until the sliding window has room for one more request"""
+        while True:
+            now = time.monotonic()
+            while window and now - window[0] >= period:
+                window.popleft()
+            if len(window) < limit:
+                window.append(now)
+                return
+            await asyncio.sleep(period - (now - window[0]))
+
+    async def _acquire(self) -> None:
+        async with self._slot_released:
+            await self._slot_released.wait_for(lambda: self._in_flight < int(self._concurrency))
+            self._in_flight += 1
+
+    async def _release(self) -> None:
+        async with self._slot_released:
+            self._in_flight -= 1
+            self._slot_released.notify_all()
+
+    def _prune_chat_windows(self) -> None:
+        """Drop windows of chats that sent nothing within the last minute"""
+        now = time.monotonic()
+        if now - self._last_prune < 60.0:
+            return
+        self._last_prune = now
+        # A window with a waiter is full of recent entries, so it is never dropped here
+        for chat_id in [
+            chat_id for chat_id, window in self._chat_windows.items()
+            if not window or now - window[-1] >= 60.0
+        ]:
+            del self._chat_windows[chat_id]
+
+    @staticmethod
+    def _message_chat_id(method: TelegramMethod) -> Optional[Union[int, str]]:
+        """Get the target chat if the request sends a message"""
+        if not method.__api_method__.startswith(_MESSAGE_METHOD_PREFIXES):
+            return None
+        return getattr(method, "chat_id", None)
+
+    @staticmethod
+    def _is_private_chat(chat_id: Union[int, str]) -> bool:
+        """Private chats have positive IDs; groups and channels are negative IDs or @usernames"""
+        if isinstance(chat_id, int):
+            return chat_id > 0
+        return chat_id.isdigit()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        while True:
+            # Windows are waited on before taking a concurrency slot: a busy chat can wait
+            # up to a minute and must not hold a slot needed by callbacks and menu edits
+            chat_id = self._message_chat_id(method)
+            if chat_id is not None:
+                self._prune_chat_windows()
+                if self._is_private_chat(chat_id):
+                    await self._wait_window(self._chat_windows[chat_id], self.private_chat_rate, 1.0)
+                else:
+                    await self._wait_window(self._chat_windows[chat_id], self.chat_rate, 60.0)
+            await self._wait_window(self._global_window, self.global_rate, 1.0)
+
+            slotted = method.__api_method__ not in _UNSLOTTED_METHODS
+            if slotted:
+                await self._acquire()
+            try:
+                started = time.monotonic()
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self._concurrency = max(1.0, self._concurrency * self.decrease_factor)
+                logger.warning(
+                    f"Flood control on {method.__api_method__}: retry in {e.retry_after}s, "
+                    f"concurrency reduced to {int(self._concurrency)}"
+                )
+                retry_after = e.retry_after
+            else:
+                if time.monotonic() - started <= self.latency_target:
+                    self._concurrency = min(self.max_concurrency, self._concurrency + self.increase_step)
+                return response
+            finally:
+                if slotted:
+                    await self._release()
+
+            await asyncio.sleep(retry_after)
+
+def _orjson_dumps(value: Any) -> str:
+    return orjson.dumps(value).decode()
+
+def create_rate_limited_bot(token: str) -> Bot:
+    """Create a bot whose API requests go through the rate limiter"""
+    config = Config()
+    # orjson serializes request payloads (markups) and parses responses faster than stdlib json.
+    # The keep-alive connection pool is sized to the most requests the limiter lets through at once
+    session = AiohttpSession(
+        limit=config.api_max_concurrency,
+        json_loads=orjson.loads,
+        json_dumps=_orjson_dumps
+    )
+    bot = Bot(token=token, session=session)
+    bot.session.middleware(RateLimitMiddleware(
+        global_rate=config.api_rate_limit,
+        chat_rate=config.chat_rate_limit,
+        private_chat_rate=config.private_chat_rate_limit,
+        max_concurrency=config.api_max_concurrency
+    ))
+    return bot
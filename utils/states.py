@@ -0,0 +1,9 @@
+from aiogram.fsm.state import State, StatesGroup
+
+class AddChannelStates(StatesGroup):
+    """Conversation states for adding a source channel"""
+    waiting_channel = State()
+
+class CloneBotStates(StatesGroup):
+    """Conversation states for cloning the bot"""
+    waiting_token = State()